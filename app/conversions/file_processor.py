@@ -1,14 +1,242 @@
-import base64
+import csv
 import io
 import json
+import logging
 import re
 import unicodedata
-from typing import List, Any, Dict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import List, Any, BinaryIO, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple, Union
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pybase64
+from pandas.io.parsers import TextParser
+from pandas.errors import EmptyDataError
+from python_calamine import CalamineSheet, CalamineWorkbook
 
 from app.profiler import cprofiled
 
+logger = logging.getLogger(__name__)
+
+# Column kinds replayed per row by build_json_data
+_NORMAL = 0
+_TARGET = 1
+_TERM_SOURCE_ID = 2
+_SCALAR = 3
+_FIRST_OF_MANY = 4
+_APPEND = 5
+_WRAP = 6
+
+# What a record holds under a name at some point of the column steps
+_HOLDS_NOTHING = 0
+_HOLDS_VALUE = 1
+_HOLDS_LIST = 2
+_HOLDS_UNKNOWN = 3
+
+# ASCII cleanup patterns used by read_workbook_xlsx
+_NON_PRINT_RE = re.compile(r"[^\x20-\x7E\s]")
+_WS_RE = re.compile(r"\s+")
+# The same cleanup as RE2 patterns for pyarrow.compute. After ASCII folding, Python's \s is
+# [\t\n\v\f\r\x1c-\x1f ], which RE2's \s does not fully cover, so it is spelled out
+_ARROW_NON_ASCII = r"[^\x00-\x7F]"
+_ARROW_NON_PRINT = r"[^\x20-\x7E\t\n\x0B\x0C\r\x1C-\x1F]"
+_ARROW_WS = r"[\t\n\x0B\x0C\r\x1C-\x1F ]+"
+
+# Record keys that build_json_data may create before the plain columns are reached
+_SPECIAL_FIELDS = frozenset({
+    "Health Status", "Cell Type", "Child Of", "Specimen Picture URL", "Derived From", "chip target",
+    "experiment target", "Experiment Target", "experiment type", "platform", "Secondary Project",
+    "File Names", "File Types", "Checksum Methods", "Checksums", "Samples", "Experiments", "Runs",
+})
+
+# Sheets whose file/sample/experiment/run columns are collected as lists
+_ANALYSIS_SHEETS = frozenset({'faang', 'ena', 'eva'})
+
+# Header lists whose plans stay cached; every distinct template sheet needs one entry,
+# and the cache is shared across uploads
+_PLAN_CACHE_SIZE = 256
+
+# Upper bound on threads converting the sheets of one workbook
+_MAX_SHEET_WORKERS = 8
+
+# Cell values pandas treats as missing by default when reading CSV/Excel; they become "" after fillna
+_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+def _dedup_csv_headers(headers: List[str]) -> List[str]:
+    """Label empty and duplicated header cells the same way pandas.read_csv does."""
+    headers = [h if h != "" else f"Unnamed: {i}" for i, h in enumerate(headers)]
+    counts = {}
+    for i, col in enumerate(headers):
+        old_col = col
+        cur_count = counts.get(col, 0)
+        if cur_count > 0:
+            while cur_count > 0:
+                counts[old_col] = cur_count + 1
+                col = f"{old_col}.{cur_count}"
+                if col in headers:
+                    cur_count += 1
+                else:
+                    cur_count = counts.get(col, 0)
+            headers[i] = col
+        counts[col] = cur_count + 1
+    return headers
+
+
+def _frame_rows(df: pd.DataFrame) -> Iterator[Tuple[str, ...]]:
+    """Rows of a string DataFrame, built from its column lists rather than a 2-D object array."""
+    return zip(*(df.iloc[:, i].tolist() for i in range(df.shape[1])))
+
+
+def _read_csv_with_pandas(data: bytes) -> Tuple[List[str], Iterator[Tuple[str, ...]]]:
+    """Read a CSV upload with pandas, for the files neither faster reader reproduces exactly."""
+    df = pd.read_csv(io.BytesIO(data), dtype=str).fillna("")
+    return df.columns.tolist(), _frame_rows(df)
+
+
+def _read_ragged_csv_rows(data: bytes) -> Optional[Tuple[List[str], List[Tuple[str, ...]]]]:
+    """
+    Read a CSV whose rows have different field counts with the csv module, padding short rows as pandas does.
+
+    Returns None when pandas would treat the file differently: rows longer than the header (pandas
+    turns the extra leading fields into an index, or fails) or whitespace-only lines (pandas skips
+    them unless they were quoted, which the csv module does not report).
+    """
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline=""))
+    # Blank lines come through as empty lists and are skipped, as in pandas
+    lines = [line for line in reader if line]
+    if not lines:
+        return None
+    num_columns = len(lines[0])
+    for line in lines:
+        if len(line) > num_columns or (len(line) == 1 and line[0].isspace()):
+            return None
+
+    headers = _dedup_csv_headers(lines[0])
+    rows = [
+        tuple("" if value in _NA_VALUES else value for value in line) + ("",) * (num_columns - len(line))
+        for line in lines[1:]
+    ]
+    return headers, rows
+
+
+def _read_csv_rows(data: bytes) -> Tuple[List[str], Iterator[Tuple[str, ...]]]:
+    """
+    Read a CSV upload into string headers and rows.
+
+    pyarrow parses the file column-wise (and multi-threaded), so rows are built straight from the
+    column lists without materialising a DataFrame. Files pyarrow rejects, usually rows with fewer
+    fields than the header, are read with the csv module, and pandas only handles what is left.
+    """
+    try:
+        # The header row fixes the column count so every column can be read as a string
+        reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline=""))
+        num_columns = len(next(row for row in reader if row))
+        names = [f"f{i}" for i in range(num_columns)]
+        table = pacsv.read_csv(
+            io.BytesIO(data),
+            read_options=pacsv.ReadOptions(column_names=names),
+            parse_options=pacsv.ParseOptions(newlines_in_values=True, ignore_empty_lines=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=False,
+            ),
+        )
+    except (StopIteration, UnicodeDecodeError, csv.Error):
+        return _read_csv_with_pandas(data)
+    except pa.ArrowInvalid:
+        table = None
+
+    # A whitespace-only line is a one-field row to pyarrow, and only fits a one-column file
+    if table is None or (num_columns == 1 and pc.any(pc.utf8_is_space(table.column(0))).as_py()):
+        try:
+            ragged = _read_ragged_csv_rows(data)
+        except csv.Error:
+            ragged = None
+        return ragged if ragged is not None else _read_csv_with_pandas(data)
+
+    headers = _dedup_csv_headers([col[0].as_py() for col in table.columns])
+    na_values = pa.array(sorted(_NA_VALUES))
+    columns = [
+        pc.if_else(pc.is_in(col, value_set=na_values), "", col).to_pylist()
+        for col in table.slice(1).columns
+    ]
+    return headers, zip(*columns)
+
+
+def _calamine_cell(value: Any) -> Any:
+    """Convert a calamine cell the way pandas' calamine reader does before parsing."""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, date):
+        return pd.Timestamp(value)
+    if isinstance(value, timedelta):
+        return pd.Timedelta(value)
+    return value
+
+
+def _calamine_text(value: Any) -> str:
+    """A calamine data cell as the string pd.read_excel(dtype=str).fillna("") gives for it."""
+    value = _calamine_cell(value)
+    if isinstance(value, str):
+        return "" if value in _NA_VALUES else value
+    return str(value)
+
+
+def _read_workbook_rows(data: Union[bytes, BinaryIO]) -> Dict[str, Tuple[List[str], Iterator[Tuple[str, ...]]]]:
+    """
+    Read every sheet of an uploaded workbook into string headers and rows.
+
+    Rows come straight from calamine instead of going through read_excel and a DataFrame. Only the
+    header row is passed to TextParser, so duplicate and empty headers get the same labels
+    as with read_excel. Data rows are converted lazily as build_json_data consumes them.
+    An upload's file object is handed to calamine as is, without a Python bytes copy.
+    """
+    workbook = CalamineWorkbook.from_filelike(io.BytesIO(data) if isinstance(data, bytes) else data)
+    sheets = {}
+    for sheet_name in workbook.sheet_names:
+        rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+        if len(rows) < 2:
+            # No data below the header row
+            sheets[sheet_name] = ([], iter(()))
+            continue
+        header_row = [_calamine_cell(cell) for cell in rows[0]]
+        headers = TextParser([header_row], header=0, skip_blank_lines=False).read().columns.tolist()
+        sheets[sheet_name] = (headers, (tuple(map(_calamine_text, row)) for row in islice(rows, 1, None)))
+    return sheets
+
+
+def _process_sheet(sheet: Tuple[str, Tuple[List[str], Iterator[Tuple[str, ...]]]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Convert the headers and rows of one sheet into its records."""
+    sheet_name, (headers, rows) = sheet
+
+    # Handle empty sheets by adding an empty list
+    if not headers:
+        return sheet_name, []
+
+    # Header processing and classification are shared by sheets with the same columns
+    plan = _sheet_plan(tuple(headers), sheet_name.lower() in _ANALYSIS_SHEETS)
+    return sheet_name, _build_records(plan, rows)
+
+
+def _process_sheets(sheets: Dict[str, Tuple[List[str], Iterator[Tuple[str, ...]]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Convert every sheet of a workbook, keeping the workbook's sheet order."""
+    if len(sheets) <= 1:
+        # Nothing to overlap, so skip the thread pool
+        return dict(map(_process_sheet, sheets.items()))
+    # Sheets are independent, so they are converted concurrently
+    with ThreadPoolExecutor(max_workers=min(len(sheets), _MAX_SHEET_WORKERS)) as executor:
+        return dict(executor.map(_process_sheet, sheets.items()))
+
 
 def parse_contents(contents, filename):
     """
@@ -24,54 +252,27 @@ def parse_contents(contents, filename):
             - sheet_names: List of sheet names
             - error_message: Error message if any, None otherwise
     """
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+    content_type, _, content_string = contents.partition(',')
+    decoded = pybase64.b64decode(content_string)
 
     try:
         if 'csv' in filename:
             # For CSV files, we only have one sheet
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8-sig')), dtype=str)
-            df = df.fillna("")
-
-            # Extract headers and rows from DataFrame
-            headers = df.columns.tolist()
-            rows = df.values.tolist()
+            headers, rows = _read_csv_rows(decoded)
 
-            # Process headers using the same logic as in Google Sheet processor
-            processed_headers = process_headers(headers)
             # For CSV, we use a default sheet name
             sheet_name = "Sheet 1"
-            # Build JSON data using the same logic as in Google Sheet processor
-            records = build_json_data(processed_headers, rows, sheet_name)
-            all_sheets_data = {sheet_name: records}
+            # Same header processing and record building as a workbook sheet, including the plan cache
+            all_sheets_data = _process_sheets({sheet_name: (headers, rows)})
             sheet_names = [sheet_name]
 
         elif 'xls' in filename or 'xlsx' in filename:
             # For Excel files, process all sheets
-            excel_file = pd.ExcelFile(io.BytesIO(decoded), engine="openpyxl")
-            sheet_names = excel_file.sheet_names
-
-            all_sheets_data = {}
-
-            for sheet_name in sheet_names:
-                df = excel_file.parse(sheet_name, dtype=str)
-                df = df.fillna("")
-
-                # Handle empty sheets by adding an empty list
-                if df.empty:
-                    all_sheets_data[sheet_name] = []
-                    continue
-
-                # Extract headers and rows from DataFrame
-                headers = df.columns.tolist()
-                rows = df.values.tolist()
+            # Read every sheet in one pass so the workbook is only opened once
+            sheets = _read_workbook_rows(decoded)
+            sheet_names = list(sheets.keys())
 
-                # Process headers using the same logic as in Google Sheet processor
-                processed_headers = process_headers(headers)
-                # Build JSON data using the same logic as in Google Sheet processor
-                records = build_json_data(processed_headers, rows, sheet_name)
-
-                all_sheets_data[sheet_name] = records
+            all_sheets_data = _process_sheets(sheets)
 
             # If no valid sheets were found, return an error
             if not all_sheets_data:
@@ -81,18 +282,27 @@ def parse_contents(contents, filename):
             return None, None, "Invalid file type. Please upload a CSV or Excel file."
 
     except Exception as e:
-        print(e)
+        logger.exception("parse_contents failed for %s", filename)
         return None, None, f"There was an error processing this file: {e}"
 
     return all_sheets_data, sheet_names, None
 
+def _is_empty_upload(file: BinaryIO) -> bool:
+    """Whether an upload's file object has no data left, without moving its position."""
+    position = file.tell()
+    empty = not file.read(1)
+    file.seek(position)
+    return empty
+
+
 @cprofiled()
 def parse_contents_api(contents, filename):
     """
     Parse the contents of an uploaded file from FastAPI and convert it to a structured format.
 
     Args:
-        contents (bytes): The binary contents of the file
+        contents (bytes or binary file): The binary contents of the file, or the upload's file object
+            (UploadFile.file) positioned at its start
         filename (str): The name of the uploaded file
 
     Returns:
@@ -105,54 +315,29 @@ def parse_contents_api(contents, filename):
         if not filename:
             return None, None, "Filename is required."
 
-        if not contents:
+        if not contents or (not isinstance(contents, bytes) and _is_empty_upload(contents)):
             return None, None, "File contents are empty."
 
         if 'csv' in filename:
+            # The CSV readers may pass over the data more than once, so a file object is read in
+            if not isinstance(contents, bytes):
+                contents = contents.read()
             # For CSV files, we only have one sheet
-            df = pd.read_csv(io.BytesIO(contents), dtype=str)
-            df = df.fillna("")
-
-            # Extract headers and rows from DataFrame
-            headers = df.columns.tolist()
-            rows = df.values.tolist()
+            headers, rows = _read_csv_rows(contents)
 
-            # Process headers using the same logic as in Google Sheet processor
-            processed_headers = process_headers(headers)
             # For CSV, we use a default sheet name
             sheet_name = "Sheet 1"
-            # Build JSON data using the same logic as in Google Sheet processor
-            records = build_json_data(processed_headers, rows, sheet_name)
-            all_sheets_data = {sheet_name: records}
+            # Same header processing and record building as a workbook sheet, including the plan cache
+            all_sheets_data = _process_sheets({sheet_name: (headers, rows)})
             sheet_names = [sheet_name]
 
         elif 'xls' in filename or 'xlsx' in filename:
             # For Excel files, process all sheets
-            excel_file = pd.ExcelFile(io.BytesIO(contents), engine="openpyxl")
-            sheet_names = excel_file.sheet_names
-
-            all_sheets_data = {}
-
-            for sheet_name in sheet_names:
-                df = excel_file.parse(sheet_name, dtype=str)
-                df = df.fillna("")
-
-                # Handle empty sheets by adding an empty list
-                if df.empty:
-                    all_sheets_data[sheet_name] = []
-                    continue
+            # Read every sheet in one pass so the workbook is only opened once
+            sheets = _read_workbook_rows(contents)
+            sheet_names = list(sheets.keys())
 
-                # Extract headers and rows from DataFrame
-                headers = df.columns.tolist()
-                rows = df.values.tolist()
-
-                # Process headers using the same logic as in Google Sheet processor
-                processed_headers = process_headers(headers)
-                # Build JSON data using the same logic as in Google Sheet processor
-                records = build_json_data(processed_headers, rows, sheet_name)
-
-                all_sheets_data[sheet_name] = records
-                # print(json.dumps(records, indent=2, default=str))
+            all_sheets_data = _process_sheets(sheets)
             # If no valid sheets were found, return an error
             if not all_sheets_data:
                 return None, None, "No valid data found in the Excel file."
@@ -161,44 +346,75 @@ def parse_contents_api(contents, filename):
             return None, None, "Invalid file type. Please upload a CSV or Excel file."
 
     except Exception as e:
-        print(e)
+        logger.exception("parse_contents_api failed for %s", filename)
         return None, None, f"There was an error processing this file: {e}"
 
     return all_sheets_data, sheet_names, None
 
 
+def _calamine_frame(sheet: CalamineSheet) -> pd.DataFrame:
+    """
+    Read a sheet as strings with row 0 as the header, matching pd.read_excel(dtype=str).
+
+    The rows come straight from calamine, and TextParser applies read_excel's header and NA handling
+    without going through ExcelFile.
+    """
+    data = [[_calamine_cell(cell) for cell in row] for row in sheet.to_python(skip_empty_area=False)]
+    if not data:
+        return pd.DataFrame()
+    try:
+        return TextParser(data, header=0, dtype=str, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
 def read_workbook_xlsx(path: str):
     def to_ascii_str(x: object) -> str:
         if x is None:
             return ""
         s = str(x)
-        s = unicodedata.normalize("NFKD", s)
-        s = s.encode("ascii", "ignore").decode("ascii", errors="ignore")
-        s = re.sub(r"[^\x20-\x7E\s]", "", s)
-        s = re.sub(r"\s+", " ", s).strip()
+        # Most cells are already ASCII, which NFKD and the ASCII round trip leave untouched
+        if not s.isascii():
+            s = unicodedata.normalize("NFKD", s)
+            s = s.encode("ascii", "ignore").decode("ascii")
+        s = _NON_PRINT_RE.sub("", s)
+        s = _WS_RE.sub(" ", s).strip()
         return s
 
+    def to_ascii_series(col: pd.Series) -> pd.Series:
+        # Same steps as to_ascii_str, run over the column's Arrow string buffer
+        arr = pa.array(col.astype(str).tolist(), type=pa.string())
+        arr = pc.utf8_normalize(arr, form="NFKD")
+        arr = pc.replace_substring_regex(arr, pattern=_ARROW_NON_ASCII, replacement="")
+        arr = pc.replace_substring_regex(arr, pattern=_ARROW_NON_PRINT, replacement="")
+        arr = pc.replace_substring_regex(arr, pattern=_ARROW_WS, replacement=" ")
+        arr = pc.utf8_trim_whitespace(arr)
+        return pd.Series(arr.to_numpy(zero_copy_only=False), index=col.index, name=col.name)
+
     def _clean_df(df: pd.DataFrame) -> pd.DataFrame:
         if df is None or df.empty:
             return pd.DataFrame()
-        df = df.dropna(how="all").dropna(axis=1, how="all")
-
-        df = df.fillna("")
-        df = df.applymap(to_ascii_str)
+        # One NaN scan drives the empty row/column drop and the fill
+        mask = df.isna()
+        row_keep = ~mask.all(axis=1)
+        col_keep = ~mask.all(axis=0)
+        df = df.loc[row_keep, col_keep].mask(mask.loc[row_keep, col_keep], "")
+        df = df.apply(to_ascii_series)
 
         df.columns = [to_ascii_str(c) for c in df.columns]
         return df
 
-    xls = pd.ExcelFile(path, engine="openpyxl")
+    workbook = CalamineWorkbook.from_path(path)
 
-    raw = {name: xls.parse(sheet_name=name, dtype=str) for name in xls.sheet_names}
-
-    return {name: _clean_df(df) for name, df in raw.items()}
+    # Clean each sheet as soon as it is read so only one raw frame is alive at a time
+    return {name: _clean_df(_calamine_frame(workbook.get_sheet_by_name(name))) for name in workbook.sheet_names}
 
 
 def process_headers(headers: List[str]) -> List[str]:
     """Process headers according to the rules for duplicates."""
     new_headers = []
+    # Names already emitted, for O(1) duplicate checks on wide sheets
+    seen = set()
     i = 0
     while i < len(headers):
         h = headers[i]
@@ -207,7 +423,7 @@ def process_headers(headers: List[str]) -> List[str]:
         if '.' in h and new_headers:
             # Concatenate with the previous header name
             prev_header = new_headers[-1]
-            new_header = h.split('.')[0]
+            new_header = h.partition('.')[0]
             new_headers.append(f"{prev_header} {new_header}")
             # Case 2: Consecutive duplicates
         elif i + 1 < len(headers) and headers[i + 1] == h:
@@ -217,29 +433,35 @@ def process_headers(headers: List[str]) -> List[str]:
                 new_headers.append(h)
         else:
             # Case 3: Non-consecutive duplicate
-            if h in new_headers:
+            if h in seen:
                 # Concatenate with the last header name
                 last_header = new_headers[-1] if new_headers else ""
                 new_headers.append(f"{last_header}_{h}")
             else:
                 new_headers.append(h)
+        seen.add(new_headers[-1])
         i += 1
     return new_headers
 
 
-def build_json_data(headers: List[str], rows: List[List[str]], sheet_name: str = "") -> List[Dict[str, Any]]:
-    """
-    Build JSON structure from processed headers and rows.
-    Only include 'Health Status' if it exists in the headers.
-    Always treat 'Child Of', 'Specimen Picture URL', 'Derived From', 'Secondary Project' as lists.
-    'File Names', 'File Types', 'Checksum Methods', 'Checksums', 'Samples', 'Experiments', and 'Runs' 
-    are treated as lists only for analysis sheets (faang, ena, eva).
-    Also handles experiment and analysis specific fields.
-    """
-    grouped_data = []
-    # Check if this is an analysis sheet
-    is_analysis_sheet = sheet_name.lower() in ['faang', 'ena', 'eva']
-    
+class _ColumnPlan(NamedTuple):
+    """How build_json_data turns one row of a sheet into a record, resolved once per header list."""
+    num_columns: int
+    # (key, factory) for the list/dict fields every record starts with
+    initial_fields: Tuple[Tuple[str, type], ...]
+    # key -> ((text column, term column or None), ...)
+    ontology_columns: Tuple[Tuple[str, Tuple[Tuple[int, Optional[int]], ...]], ...]
+    # key -> column indexes whose non-empty values are collected as a list
+    list_columns: Tuple[Tuple[str, Tuple[int, ...]], ...]
+    # key -> column indexes whose non-empty values are collected as {"value": ...}
+    value_columns: Tuple[Tuple[str, Tuple[int, ...]], ...]
+    # (kind, key, column, term column or None) in header order
+    steps: Tuple[Tuple[int, str, int, Optional[int]], ...]
+
+
+@lru_cache(maxsize=_PLAN_CACHE_SIZE)
+def _plan_columns(headers: Tuple[str, ...], is_analysis_sheet: bool) -> _ColumnPlan:
+    """Classify processed headers into the per-row work done by _build_records."""
     has_health_status = any(h.startswith("Health Status") for h in headers)
     has_cell_type = any(h.startswith("Cell Type") for h in headers)
     has_child_of = any(h == "Child Of" for h in headers)
@@ -261,231 +483,288 @@ def build_json_data(headers: List[str], rows: List[List[str]], sheet_name: str =
     has_experiments = is_analysis_sheet and any(h.startswith("Experiments") for h in headers)
     has_runs = is_analysis_sheet and any(h.startswith("Runs") for h in headers)
 
-    for row in rows:
-        record: Dict[str, Any] = {}
-        if has_health_status:
-            record["Health Status"] = []
-        if has_cell_type:
-            record["Cell Type"] = []
-        if has_child_of:
-            record["Child Of"] = []
-        if has_specimen_picture_url:
-            record["Specimen Picture URL"] = []
-        if has_derived_from:
-            record["Derived From"] = []
-        if has_chip_target:
-            record["chip target"] = {}
-        if has_experiment_target:
-            record["experiment target"] = {}
-        if has_experiment_type:
-            record["experiment type"] = []
-        if has_platform:
-            record["platform"] = []
-        if has_secondary_project:
-            record["Secondary Project"] = []
-        if has_file_names:
-            record["File Names"] = []
-        if has_file_types:
-            record["File Types"] = []
-        if has_checksum_methods:
-            record["Checksum Methods"] = []
-        if has_checksums:
-            record["Checksums"] = []
-        if has_samples:
-            record["Samples"] = []
-        if has_experiments:
-            record["Experiments"] = []
-        if has_runs:
-            record["Runs"] = []
-
-        i = 0
-        while i < len(headers):
-            col = headers[i]
-            val = row[i] if i < len(row) else ""
-
-            # Special handling if Health Status is in headers
-            if has_health_status and col.startswith("Health Status"):
-                # Check next column for Term Source ID
-                if i + 1 < len(headers) and "Term Source ID" in headers[i + 1]:
-                    term_val = row[i + 1] if i + 1 < len(row) else ""
-
-                    record["Health Status"].append({
-                        "text": val,
-                        "term": term_val
-                    })
-                    i += 2
-                else:
-                    if val:
-                        record["Health Status"].append({
-                            "text": val.strip(),
-                            "term": ""
-                        })
-                    i += 1
-                continue
-            if has_health_status and col.startswith("Cell Type"):
-                # Check next column for Term Source ID
-                if i + 1 < len(headers) and "Term Source ID" in headers[i + 1]:
-                    term_val = row[i + 1] if i + 1 < len(row) else ""
-
-                    record["Cell Type"].append({
-                        "text": val,
-                        "term": term_val
-                    })
-                    i += 2
-                else:
-                    if val:
-                        record["Cell Type"].append({
-                            "text": val.strip(),
-                            "term": ""
-                        })
-                    i += 1
-                continue
-
-            # Special handling for Child Of headers
-            elif has_child_of and col.startswith("Child Of"):
-                if val:  # Only append non-empty values
-                    record["Child Of"].append(val)
-                i += 1
-                continue
-
-            # Special handling for Specimen Picture URL headers
-            elif has_specimen_picture_url and col.startswith("Specimen Picture URL"):
-                if val:  # Only append non-empty values
-                    record["Specimen Picture URL"].append(val)
-                i += 1
-                continue
+    initial_fields = tuple(
+        (key, factory) for key, factory, present in (
+            ("Health Status", list, has_health_status),
+            ("Cell Type", list, has_cell_type),
+            ("Child Of", list, has_child_of),
+            ("Specimen Picture URL", list, has_specimen_picture_url),
+            ("Derived From", list, has_derived_from),
+            ("chip target", dict, has_chip_target),
+            ("experiment target", dict, has_experiment_target),
+            ("experiment type", list, has_experiment_type),
+            ("platform", list, has_platform),
+            ("Secondary Project", list, has_secondary_project),
+            ("File Names", list, has_file_names),
+            ("File Types", list, has_file_types),
+            ("Checksum Methods", list, has_checksum_methods),
+            ("Checksums", list, has_checksums),
+            ("Samples", list, has_samples),
+            ("Experiments", list, has_experiments),
+            ("Runs", list, has_runs),
+        ) if present
+    )
+
+    # List-valued fields are gathered per column group,
+    # everything else becomes an ordered step that is replayed for each row
+    ontology_columns: Dict[str, List[Tuple[int, Optional[int]]]] = {}
+    list_columns: Dict[str, List[int]] = {}
+    value_columns: Dict[str, List[int]] = {}
+    steps: List[Tuple[int, str, int, Optional[int]]] = []
+    num_headers = len(headers)
+    # Whether an experiment target column seen so far always / sometimes sets "Experiment Target"
+    experiment_target_always = False
+    experiment_target_seen = False
 
-            # Special handling for Derived From headers
-            elif has_derived_from and col.startswith("Derived From"):
-                if val:  # Only append non-empty values
-                    record["Derived From"].append(val)
+    i = 0
+    while i < num_headers:
+        col = headers[i]
+        next_header = headers[i + 1] if i + 1 < num_headers else None
+
+        # Special handling if Health Status is in headers
+        if has_health_status and (col.startswith("Health Status") or col.startswith("Cell Type")):
+            key = "Health Status" if col.startswith("Health Status") else "Cell Type"
+            # Check next column for Term Source ID
+            if next_header is not None and "Term Source ID" in next_header:
+                ontology_columns.setdefault(key, []).append((i, i + 1))
+                i += 2
+            else:
+                ontology_columns.setdefault(key, []).append((i, None))
                 i += 1
+            continue
+
+        # Plain list fields: Child Of, Specimen Picture URL, Derived From and the analysis file lists
+        if has_child_of and col.startswith("Child Of"):
+            list_columns.setdefault("Child Of", []).append(i)
+        elif has_specimen_picture_url and col.startswith("Specimen Picture URL"):
+            list_columns.setdefault("Specimen Picture URL", []).append(i)
+        elif has_derived_from and col.startswith("Derived From"):
+            list_columns.setdefault("Derived From", []).append(i)
+
+        # chip target and experiment target (experiment fields), paired with a Term column if present
+        elif (has_chip_target and col.startswith("chip target")) or \
+                (has_experiment_target and col.lower().startswith("experiment target")):
+            key = "chip target" if has_chip_target and col.startswith("chip target") else "Experiment Target"
+            paired = next_header is not None and ("Term Source ID" in next_header or "Term" in next_header)
+            if key == "Experiment Target":
+                experiment_target_seen = True
+                experiment_target_always = experiment_target_always or paired
+            if paired:
+                steps.append((_TARGET, key, i, i + 1))
+                i += 2
                 continue
+            steps.append((_TARGET, key, i, None))
+
+        # Skip "Term Source ID" if it's already processed as part of experiment target
+        elif col == "Term Source ID" and experiment_target_seen:
+            if not experiment_target_always:
+                # Only skipped in rows where an earlier experiment target had a value
+                steps.append((_TERM_SOURCE_ID, col, i, None))
+
+        # experiment type, platform and Secondary Project (arrays of objects)
+        elif has_experiment_type and col.startswith("experiment type"):
+            value_columns.setdefault("experiment type", []).append(i)
+        elif has_platform and col.startswith("platform"):
+            value_columns.setdefault("platform", []).append(i)
+        elif has_secondary_project and col.startswith("Secondary Project"):
+            value_columns.setdefault("Secondary Project", []).append(i)
+
+        elif has_file_names and col.startswith("File Names"):
+            list_columns.setdefault("File Names", []).append(i)
+        elif has_file_types and col.startswith("File Types"):
+            list_columns.setdefault("File Types", []).append(i)
+        elif has_checksum_methods and col.startswith("Checksum Methods"):
+            list_columns.setdefault("Checksum Methods", []).append(i)
+        elif has_checksums and col.startswith("Checksums"):
+            list_columns.setdefault("Checksums", []).append(i)
+        elif has_samples and col.startswith("Samples"):
+            list_columns.setdefault("Samples", []).append(i)
+        elif has_experiments and col.startswith("Experiments"):
+            list_columns.setdefault("Experiments", []).append(i)
+        elif has_runs and col.startswith("Runs"):
+            list_columns.setdefault("Runs", []).append(i)
+
+        # Normal processing for all other columns
+        else:
+            steps.append((_NORMAL, col, i, None))
+        i += 1
 
-            # Special handling for chip target (experiment field)
-            elif has_chip_target and col.startswith("chip target"):
-                # Check next column for Term Source ID or Term
-                if i + 1 < len(headers) and ("Term Source ID" in headers[i + 1] or "Term" in headers[i + 1]):
-                    term_val = row[i + 1] if i + 1 < len(row) else ""
-                    record["chip target"] = {
-                        "text": val,
-                        "term": term_val
-                    }
-                    i += 2
-                else:
-                    # If only text is provided, set term to empty
-                    if val:
-                        record["chip target"] = {
-                            "text": val,
-                            "term": ""
-                        }
-                    i += 1
-                continue
+    # Plain columns whose name repeats always end up as a list, so resolve scalar vs list once.
+    # Names shared with a special field or a conditionally skipped column keep the per-row check.
+    dynamic_names = _SPECIAL_FIELDS.union(col for kind, col, _, _ in steps if kind == _TERM_SOURCE_ID)
+    name_counts = Counter(col for kind, col, _, _ in steps if kind == _NORMAL)
+    seen_names = set()
+    for step_idx, (kind, col, idx, term_idx) in enumerate(steps):
+        if kind != _NORMAL or col in dynamic_names:
+            continue
+        if name_counts[col] == 1:
+            kind = _SCALAR
+        elif col in seen_names:
+            kind = _APPEND
+        else:
+            kind = _FIRST_OF_MANY
+            seen_names.add(col)
+        steps[step_idx] = (kind, col, idx, term_idx)
+
+    # The remaining plain columns share a name with a special field or a conditional column. Walk the
+    # steps tracking what the record holds under each name, and resolve every column where that is
+    # the same for all rows: nothing yet (set), a list (append) or a single value (wrap into a list)
+    holds = {key: _HOLDS_LIST if factory is list else _HOLDS_VALUE for key, factory in initial_fields}
+    for step_idx, (kind, col, idx, term_idx) in enumerate(steps):
+        current = holds.get(col, _HOLDS_NOTHING)
+        if kind == _TARGET:
+            # Without a term column the target is only set when the cell has a value
+            holds[col] = _HOLDS_VALUE if term_idx is not None or current == _HOLDS_VALUE else _HOLDS_UNKNOWN
+        elif kind == _TERM_SOURCE_ID:
+            # Skipped in some rows: appending to a list leaves a list either way
+            holds[col] = _HOLDS_LIST if current == _HOLDS_LIST else _HOLDS_UNKNOWN
+        elif kind == _NORMAL:
+            if current == _HOLDS_NOTHING:
+                steps[step_idx] = (_SCALAR, col, idx, term_idx)
+                holds[col] = _HOLDS_VALUE
+            elif current == _HOLDS_LIST:
+                steps[step_idx] = (_APPEND, col, idx, term_idx)
+            elif current == _HOLDS_VALUE:
+                steps[step_idx] = (_WRAP, col, idx, term_idx)
+                holds[col] = _HOLDS_LIST
+        elif kind == _SCALAR:
+            holds[col] = _HOLDS_VALUE
+        else:
+            holds[col] = _HOLDS_LIST
+
+    return _ColumnPlan(
+        num_columns=num_headers,
+        initial_fields=initial_fields,
+        ontology_columns=tuple((key, tuple(pairs)) for key, pairs in ontology_columns.items()),
+        list_columns=tuple((key, tuple(indexes)) for key, indexes in list_columns.items()),
+        value_columns=tuple((key, tuple(indexes)) for key, indexes in value_columns.items()),
+        steps=tuple(steps),
+    )
+
+
+@lru_cache(maxsize=_PLAN_CACHE_SIZE)
+def _sheet_plan(headers: Tuple[str, ...], is_analysis_sheet: bool) -> _ColumnPlan:
+    """Column plan for a raw header row, i.e. process_headers followed by _plan_columns."""
+    return _plan_columns(tuple(process_headers(list(headers))), is_analysis_sheet)
+
+
+def _plain_column_code(key: str, idx: int) -> List[str]:
+    """Statements for a column that becomes a list only when its name is already in the record."""
+    return [
+        f"if {key!r} in record:",
+        f"    value = record[{key!r}]",
+        "    if not isinstance(value, list):",
+        f"        record[{key!r}] = value = [value]",
+        f"    value.append(row[{idx}])",
+        "else:",
+        f"    record[{key!r}] = row[{idx}]",
+    ]
+
+
+@lru_cache(maxsize=_PLAN_CACHE_SIZE)
+def _compile_record_builder(plan: _ColumnPlan) -> Callable[[Iterable[Sequence[str]]], List[Dict[str, Any]]]:
+    """
+    Generate a row-to-record function specialised to a column plan.
 
-            # Special handling for experiment target (experiment field)
-            elif has_experiment_target and col.lower().startswith("experiment target"):
-                # Check next column for Term Source ID or Term
-                if i + 1 < len(headers) and ("Term Source ID" in headers[i + 1] or "Term" in headers[i + 1]):
-                    term_val = row[i + 1] if i + 1 < len(row) else ""
-                    record["Experiment Target"] = {
-                        "text": val,
-                        "term": term_val
-                    }
-                    i += 2
+    Every column index and key is written into the source as a literal, so converting a row is a
+    straight run of dict/list displays with no per-column dispatch. Keys are emitted with repr(),
+    never interpolated raw.
+    """
+    # The record starts as one dict display: the initial fields, then steps that always set a value
+    entries = []
+    fields = dict(plan.initial_fields)
+    ontology_columns = dict(plan.ontology_columns)
+    list_columns = dict(plan.list_columns)
+    value_columns = dict(plan.value_columns)
+    for key, factory in plan.initial_fields:
+        if key in ontology_columns:
+            items = []
+            for text_idx, term_idx in ontology_columns[key]:
+                if term_idx is not None:
+                    items.append(f"{{'text': row[{text_idx}], 'term': row[{term_idx}]}}")
                 else:
-                    # If only text is provided, set term to empty
-                    if val:
-                        record["Experiment Target"] = {
-                            "text": val,
-                            "term": ""
-                        }
-                    i += 1
-                continue
-            
-            # Skip "Term Source ID" if it's already processed as part of experiment target
-            elif col == "Term Source ID" and "Experiment Target" in record:
-                i += 1
-                continue
-
-            # Special handling for experiment type (analysis field - array of objects)
-            elif has_experiment_type and col.startswith("experiment type"):
-                if val:  # Only append non-empty values
-                    record["experiment type"].append({"value": val})
-                i += 1
-                continue
-
-            # Special handling for platform (analysis field - array of objects)
-            elif has_platform and col.startswith("platform"):
-                if val:  # Only append non-empty values
-                    record["platform"].append({"value": val})
-                i += 1
-                continue
-
-            # Special handling for Secondary Project (analysis field - array of objects)
-            elif has_secondary_project and col.startswith("Secondary Project"):
-                if val:  # Only append non-empty values
-                    record["Secondary Project"].append({"value": val})
-                i += 1
-                continue
-
-            # Special handling for File Names (list field)
-            elif has_file_names and col.startswith("File Names"):
-                if val:  # Only append non-empty values
-                    record["File Names"].append(val)
-                i += 1
-                continue
-
-            # Special handling for File Types (list field)
-            elif has_file_types and col.startswith("File Types"):
-                if val:  # Only append non-empty values
-                    record["File Types"].append(val)
-                i += 1
-                continue
-
-            # Special handling for Checksum Methods (list field)
-            elif has_checksum_methods and col.startswith("Checksum Methods"):
-                if val:  # Only append non-empty values
-                    record["Checksum Methods"].append(val)
-                i += 1
-                continue
-
-            # Special handling for Checksums (list field)
-            elif has_checksums and col.startswith("Checksums"):
-                if val:  # Only append non-empty values
-                    record["Checksums"].append(val)
-                i += 1
-                continue
-
-            # Special handling for Samples (list field)
-            elif has_samples and col.startswith("Samples"):
-                if val:  # Only append non-empty values
-                    record["Samples"].append(val)
-                i += 1
-                continue
-
-            # Special handling for Experiments (list field)
-            elif has_experiments and col.startswith("Experiments"):
-                if val:  # Only append non-empty values
-                    record["Experiments"].append(val)
-                i += 1
-                continue
-
-            # Special handling for Runs (list field)
-            elif has_runs and col.startswith("Runs"):
-                if val:  # Only append non-empty values
-                    record["Runs"].append(val)
-                i += 1
-                continue
-
-            # Normal processing for all other columns
-            if col in record:
-                if not isinstance(record[col], list):
-                    record[col] = [record[col]]
-                record[col].append(val)
+                    items.append(f"*([{{'text': row[{text_idx}].strip(), 'term': ''}}] if row[{text_idx}] else ())")
+            value = f"[{', '.join(items)}]"
+        elif key in list_columns:
+            # Only include non-empty values
+            value = f"[value for value in ({''.join(f'row[{idx}], ' for idx in list_columns[key])}) if value]"
+        elif key in value_columns:
+            indexes = ''.join(f'row[{idx}], ' for idx in value_columns[key])
+            value = f"[{{'value': value}} for value in ({indexes}) if value]"
+        else:
+            value = "[]" if fields[key] is list else "{}"
+        entries.append(f"{key!r}: {value}")
+
+    steps = list(plan.steps)
+    while steps:
+        kind, key, idx, term_idx = steps[0]
+        if kind == _SCALAR:
+            entries.append(f"{key!r}: row[{idx}]")
+        elif kind == _FIRST_OF_MANY:
+            entries.append(f"{key!r}: [row[{idx}]]")
+        elif kind == _TARGET and term_idx is not None:
+            # A repeated key in a dict display keeps its first position and takes the last value,
+            # exactly like successive assignments
+            entries.append(f"{key!r}: {{'text': row[{idx}], 'term': row[{term_idx}]}}")
+        else:
+            break
+        steps.pop(0)
+
+    body = [f"record = {{{', '.join(entries)}}}"]
+    for kind, key, idx, term_idx in steps:
+        if kind == _SCALAR:
+            body.append(f"record[{key!r}] = row[{idx}]")
+        elif kind == _APPEND:
+            body.append(f"record[{key!r}].append(row[{idx}])")
+        elif kind == _FIRST_OF_MANY:
+            body.append(f"record[{key!r}] = [row[{idx}]]")
+        elif kind == _WRAP:
+            body.append(f"record[{key!r}] = [record[{key!r}], row[{idx}]]")
+        elif kind == _TARGET:
+            if term_idx is not None:
+                body.append(f"record[{key!r}] = {{'text': row[{idx}], 'term': row[{term_idx}]}}")
             else:
-                record[col] = val
-            i += 1
-
-        grouped_data.append(record)
-
-    return grouped_data
+                # If only text is provided, set term to empty
+                body.append(f"if row[{idx}]:")
+                body.append(f"    record[{key!r}] = {{'text': row[{idx}], 'term': ''}}")
+        elif kind == _TERM_SOURCE_ID:
+            body.append("if 'Experiment Target' not in record:")
+            body.extend(f"    {line}" for line in _plain_column_code(key, idx))
+        else:
+            body.extend(_plain_column_code(key, idx))
+
+    num_columns = plan.num_columns
+    source = "\n".join([
+        "def build_records(rows):",
+        "    records = []",
+        "    append = records.append",
+        "    for row in rows:",
+        # Pad short rows so every column index can be read directly
+        f"        if len(row) < {num_columns}:",
+        f"            row = list(row) + [''] * ({num_columns} - len(row))",
+        *(f"        {line}" for line in body),
+        "        append(record)",
+        "    return records",
+    ])
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<build_json_data>", "exec"), namespace)
+    return namespace["build_records"]
+
+
+def _build_records(plan: _ColumnPlan, rows: Iterable[Sequence[str]]) -> List[Dict[str, Any]]:
+    """Apply a column plan to every row through its generated builder."""
+    return _compile_record_builder(plan)(rows)
+
+
+def build_json_data(headers: List[str], rows: Iterable[Sequence[str]], sheet_name: str = "") -> List[Dict[str, Any]]:
+    """
+    Build JSON structure from processed headers and rows.
+    Only include 'Health Status' if it exists in the headers.
+    Always treat 'Child Of', 'Specimen Picture URL', 'Derived From', 'Secondary Project' as lists.
+    'File Names', 'File Types', 'Checksum Methods', 'Checksums', 'Samples', 'Experiments', and 'Runs' 
+    are treated as lists only for analysis sheets (faang, ena, eva).
+    Also handles experiment and analysis specific fields.
+    """
+    # Check if this is an analysis sheet
+    is_analysis_sheet = sheet_name.lower() in _ANALYSIS_SHEETS
+    return _build_records(_plan_columns(tuple(headers), is_analysis_sheet), rows)
@@ -1,10 +1,117 @@
-from lxml import etree
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple, Union
+import orjson
+import re
 import uuid
 from pathlib import Path
 
+# lxml's serializer escaping rules, so hand-built documents come out byte-identical to what it wrote
+_XML_DECLARATION = b"<?xml version='1.0' encoding='UTF-8'?>\n"
+_ANALYSIS_SET_OPEN = _XML_DECLARATION + b'<ANALYSIS_SET>\n'
+_ANALYSIS_SET_CLOSE = b'</ANALYSIS_SET>\n'
+_SUBMISSION_SET_OPEN = _XML_DECLARATION + b'<SUBMISSION_SET>\n'
+_SUBMISSION_SET_CLOSE = b'</SUBMISSION_SET>\n'
+_XML_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '\r': '&#13;'})
+_XML_ATTR_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+                                   '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'})
+_XML_INVALID_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_XML_NAME_RE = re.compile(r'[^\W\d][\w.\-]*')
+
+_SUBMISSION_ADD_TEMPLATE = ('  <SUBMISSION alias="{alias}">\n'
+                            '    <ACTIONS>\n'
+                            '      <ACTION>\n'
+                            '        <ADD/>\n'
+                            '      </ACTION>\n'
+                            '      <ACTION>\n'
+                            '        <RELEASE/>\n'
+                            '      </ACTION>\n'
+                            '    </ACTIONS>\n'
+                            '  </SUBMISSION>\n')
+_SUBMISSION_UPDATE_TEMPLATE = ('  <SUBMISSION alias="{alias}">\n'
+                               '    <ACTIONS>\n'
+                               '      <ACTION>\n'
+                               '        <MODIFY/>\n'
+                               '      </ACTION>\n'
+                               '    </ACTIONS>\n'
+                               '  </SUBMISSION>\n')
+
+
+def _xml_escape(value, table) -> str:
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    elif not isinstance(value, str):
+        raise TypeError(f"Argument must be bytes or unicode, got '{type(value).__name__}'")
+    if _XML_INVALID_CHARS_RE.search(value):
+        raise ValueError('All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters')
+    return value.translate(table)
+
+
+def _xml_text(value) -> str:
+    return _xml_escape(value, _XML_TEXT_ESCAPES)
+
+
+def _xml_attr(value) -> str:
+    return _xml_escape(value, _XML_ATTR_ESCAPES)
+
+
+def _xml_tag(name) -> str:
+    name = _xml_escape(name, _XML_TEXT_ESCAPES)
+    if not name:
+        raise ValueError('Empty tag name')
+    if not _XML_NAME_RE.fullmatch(name):
+        raise ValueError(f'Invalid tag name {name!r}')
+    return name
+
+
+def _as_str(value) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+@lru_cache(maxsize=64)
+def _analysis_type_element(analysis_type: str) -> str:
+    # one prebuilt fragment per ENA analysis type; the tag name is only validated once
+    return f'    <ANALYSIS_TYPE>\n      <{_xml_tag(analysis_type)}/>\n    </ANALYSIS_TYPE>\n'
+
+
+def _clean(value) -> Optional[str]:
+    # optional free-text fields: stripped once, then used for both the presence check and the output
+    return value.strip() if isinstance(value, str) else None
+
+
+def _as_list(value) -> Sequence[Any]:
+    # reference and multi-value fields may arrive as a list, a single value or nothing
+    if not value:
+        return ()
+    return value if isinstance(value, (list, tuple)) else (value,)
+
+
+def _has_value(value) -> bool:
+    return bool(value.strip()) if isinstance(value, str) else bool(value)
+
+
+def _analysis_attribute(tag: str, value, unit=None) -> str:
+    value = _xml_text(value)
+    units = f'        <UNITS>{_xml_text(unit)}</UNITS>\n' if unit else ''
+    return (f'      <ANALYSIS_ATTRIBUTE>\n        <TAG>{tag}</TAG>\n'
+            f'        <VALUE>{value}</VALUE>\n{units}      </ANALYSIS_ATTRIBUTE>\n')
+
+
+def get_xml_files(json_data: Union[Dict[str, Any], str, bytes], submission_id: Optional[str] = None,
+                  action: str = "submission", return_bytes: bool = False):
+    # accept an already-serialized payload without a stdlib json round trip
+    if isinstance(json_data, (str, bytes, bytearray, memoryview)):
+        try:
+            json_data = orjson.loads(json_data)
+        except orjson.JSONDecodeError as e:
+            return f'Error: Invalid JSON data: {str(e)}', None
+
+    # callers that upload the documents themselves get them in memory, nothing is written
+    if return_bytes:
+        analysis_result = generate_analysis_xml(json_data, return_bytes=True)
+        if isinstance(analysis_result, str):
+            return analysis_result, None
+        return analysis_result, generate_submission_xml(json_data, action=action, return_bytes=True)
 
-def get_xml_files(json_data: Dict[str, Any], submission_id: Optional[str] = None, action: str = "submission"):
     # create XMLs directory if it doesn't exist
     xml_dir = Path("XMLs")
     xml_dir.mkdir(exist_ok=True)
@@ -28,230 +135,194 @@ def get_xml_files(json_data: Dict[str, Any], submission_id: Optional[str] = None
 
     return analysis_result, submission_result
 
-def generate_analysis_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None) -> str:
+def _validate_analysis_records(ena_records: List[Dict[str, Any]], faang_records: List[Dict[str, Any]]
+                               ) -> Tuple[Optional[str], List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """
+    Check every ENA/FAANG record pair before any XML is built.
+
+    Returns:
+        (error, record_models): error is an 'Error: ...' string for the first invalid record
+        (or None), record_models the paired (ena_model, faang_model) dicts to serialize.
+    """
+    if not ena_records:
+        return 'Error: No valid ENA records found in JSON data', []
+
+    if not faang_records:
+        return 'Error: No valid FAANG records found in JSON data', []
+
+    if len(ena_records) != len(faang_records):
+        return f'Error: Mismatch in number of records - ENA: {len(ena_records)}, FAANG: {len(faang_records)}', []
+
+    record_models = []
+    for record_number, (ena_record, faang_record) in enumerate(zip(ena_records, faang_records)):
+        ena_model = ena_record.get('model', {})
+        faang_model = faang_record.get('model', {})
+        ena_get = ena_model.get
+        faang_get = faang_model.get
+
+        alias = ena_get('Alias')
+        if not alias:
+            return f'Error: Missing Alias in ENA record {record_number}', []
+
+        if not ena_get('Analysis Type'):
+            return f'Error: Missing Analysis Type in ENA record {record_number}', []
+
+        if not ena_get('Study'):
+            return f'Error: Missing Study in ENA record {record_number}', []
+
+        file_names = ena_get('File Names', [])
+        if len(file_names) != len(ena_get('File Types', [])) or len(file_names) != len(
+                ena_get('Checksum Methods', [])) or len(file_names) != len(ena_get('Checksums', [])):
+            return f'Error: Mismatch in file arrays length in ENA record {record_number}', []
+
+        faang_alias = faang_get('Alias')
+        if not faang_alias:
+            return f'Error: Missing Alias in FAANG record {record_number}', []
+
+        if faang_alias != alias:
+            return f'Error: Analysis alias is not consistent between ENA and FAANG records - ENA: {alias}, FAANG: {faang_alias}', []
+
+        if not faang_get('Project'):
+            return f'Error: Missing Project in FAANG record {record_number}', []
+
+        if not faang_get('Assay Type'):
+            return f'Error: Missing Assay Type in FAANG record {record_number}', []
+
+        if not faang_get('Analysis Protocol'):
+            return f'Error: Missing Analysis Protocol in FAANG record {record_number}', []
+
+        record_models.append((ena_model, faang_model))
+
+    return None, record_models
+
+
+def _analysis_element(ena_model: Dict[str, Any], faang_model: Dict[str, Any]) -> str:
+    """Render one pretty-printed <ANALYSIS> element (indented for ANALYSIS_SET)."""
+    ena_get = ena_model.get
+    faang_get = faang_model.get
+
+    # Extract ENA fields from model
+    alias = ena_get('Alias')
+    analysis_type = ena_get('Analysis Type')
+    study = ena_get('Study')
+    title = _clean(ena_get('Title'))
+    description = _clean(ena_get('Description'))
+    samples = _as_list(ena_get('Samples'))
+    experiments = _as_list(ena_get('Experiments'))
+    runs = _as_list(ena_get('Runs'))
+    related_analyses = _as_list(ena_get('Related Analyses'))
+
+    file_names = ena_get('File Names', [])
+    file_types = ena_get('File Types', [])
+    checksum_methods = ena_get('Checksum Methods', [])
+    checksums = ena_get('Checksums', [])
+
+    analysis_center = _clean(ena_get('Analysis Center'))
+    analysis_date = _clean(ena_get('Analysis Date'))
+    analysis_date_unit = _clean(ena_get('Unit'))
+
+    # Extract FAANG fields from model
+    project = faang_get('Project')
+    secondary_project = _as_list(faang_get('Secondary Project'))
+    assay_type = faang_get('Assay Type')
+    analysis_protocol = faang_get('Analysis Protocol')
+    analysis_code = _clean(faang_get('Analysis Code'))
+    reference_genome = _clean(faang_get('Reference Genome'))
+
+    # Create ANALYSIS element
+    out = [f'  <ANALYSIS alias="{_xml_attr(alias)}">\n']
+    add = out.append
+
+    # Add title if present
+    if title:
+        add(f'    <TITLE>{_xml_text(title)}</TITLE>\n')
+
+    # Add description if present
+    if description:
+        add(f'    <DESCRIPTION>{_xml_text(description)}</DESCRIPTION>\n')
+
+    # Add study reference
+    add(f'    <STUDY_REF accession="{_xml_attr(study)}"/>\n')
+
+    # Add sample, experiment, run and related analysis references if present
+    for ref_tag, accessions in (('SAMPLE_REF', samples), ('EXPERIMENT_REF', experiments), ('RUN_REF', runs),
+                                ('ANALYSIS_REF', related_analyses)):
+        for accession in accessions:
+            if _has_value(accession):
+                add(f'    <{ref_tag} accession="{_xml_attr(_as_str(accession))}"/>\n')
+
+    # Add analysis type
+    add(_analysis_type_element(analysis_type))
+
+    # Add files
+    if file_names:
+        add('    <FILES>\n')
+        # array lengths were checked in _validate_analysis_records
+        for filename, filetype, checksum_method, checksum in zip(file_names, file_types, checksum_methods, checksums):
+            add(f'      <FILE filename="{_xml_attr(_as_str(filename))}" filetype="{_xml_attr(_as_str(filetype))}" '
+                f'checksum_method="{_xml_attr(_as_str(checksum_method))}" checksum="{_xml_attr(_as_str(checksum))}"/>\n')
+        add('    </FILES>\n')
+    else:
+        add('    <FILES/>\n')
+
+    # Add analysis attributes: (TAG, values, required, UNITS)
+    attributes = (
+        ('Project', (project,), True, None),
+        ('Secondary Project', secondary_project, False, None),
+        ('Assay Type', (assay_type,), True, None),
+        ('Analysis Protocol', (analysis_protocol,), True, None),
+        ('Analysis code', (analysis_code,), False, None),
+        ('Reference genome', (reference_genome,), False, None),
+        ('Analysis center', (analysis_center,), False, None),
+        ('Analysis date', (analysis_date,), False, analysis_date_unit),
+    )
+    add('    <ANALYSIS_ATTRIBUTES>\n')
+    for tag, values, required, unit in attributes:
+        for item in values:
+            if required or _has_value(item):
+                add(_analysis_attribute(tag, _as_str(item), unit if _has_value(unit) else None))
+    add('    </ANALYSIS_ATTRIBUTES>\n  </ANALYSIS>\n')
+    return ''.join(out)
+
+
+def _analysis_xml_chunks(record_models: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Iterator[bytes]:
+    yield _ANALYSIS_SET_OPEN
+    for ena_model, faang_model in record_models:
+        yield _analysis_element(ena_model, faang_model).encode('utf-8')
+    yield _ANALYSIS_SET_CLOSE
+
+
+def generate_analysis_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None,
+                          return_bytes: bool = False) -> Union[str, bytes]:
     try:
-        ena_data = json_data.get('analysis_results', {}).get('ena', {})
-        faang_data = json_data.get('analysis_results', {}).get('faang', {})
+        analysis_results = json_data.get('analysis_results', {})
+        ena_data = analysis_results.get('ena', {})
+        faang_data = analysis_results.get('faang', {})
 
         ena_records = ena_data.get('valid', []) if isinstance(ena_data, dict) else []
         faang_records = faang_data.get('valid', []) if isinstance(faang_data, dict) else []
 
-        if not ena_records:
-            return 'Error: No valid ENA records found in JSON data'
-
-        if not faang_records:
-            return 'Error: No valid FAANG records found in JSON data'
-
-        if len(ena_records) != len(faang_records):
-            return f'Error: Mismatch in number of records - ENA: {len(ena_records)}, FAANG: {len(faang_records)}'
-
-        # Create XML structure
-        analysis_set = etree.Element('ANALYSIS_SET')
-        analysis_xml = etree.ElementTree(analysis_set)
-
-        number_of_records = len(ena_records)
+        error, record_models = _validate_analysis_records(ena_records, faang_records)
+        if error:
+            return error
 
-        for record_number in range(number_of_records):
-            # Get records and extract model data
-            ena_record = ena_records[record_number]
-            faang_record = faang_records[record_number]
-
-            # Get model dictionaries
-            ena_model = ena_record.get('model', {})
-            faang_model = faang_record.get('model', {})
-
-            # Extract ENA fields from model
-            alias = ena_model.get('Alias')
-            if not alias:
-                return f'Error: Missing Alias in ENA record {record_number}'
-
-            analysis_type = ena_model.get('Analysis Type')
-            if not analysis_type:
-                return f'Error: Missing Analysis Type in ENA record {record_number}'
-
-            study = ena_model.get('Study')
-            if not study:
-                return f'Error: Missing Study in ENA record {record_number}'
-
-            title = ena_model.get('Title')
-            description = ena_model.get('Description')
-            samples = ena_model.get('Samples', [])
-            experiments = ena_model.get('Experiments', [])
-            runs = ena_model.get('Runs', [])
-            related_analyses = ena_model.get('Related Analyses')
-
-            file_names = ena_model.get('File Names', [])
-            file_types = ena_model.get('File Types', [])
-            checksum_methods = ena_model.get('Checksum Methods', [])
-            checksums = ena_model.get('Checksums', [])
-
-            if len(file_names) != len(file_types) or len(file_names) != len(checksum_methods) or len(file_names) != len(
-                    checksums):
-                return f'Error: Mismatch in file arrays length in ENA record {record_number}'
-
-            analysis_center = ena_model.get('Analysis Center')
-            analysis_date = ena_model.get('Analysis Date')
-            analysis_date_unit = ena_model.get('Unit')
-
-            # Extract FAANG fields from model
-            faang_alias = faang_model.get('Alias')
-            if not faang_alias:
-                return f'Error: Missing Alias in FAANG record {record_number}'
-
-            if faang_alias != alias:
-                return f'Error: Analysis alias is not consistent between ENA and FAANG records - ENA: {alias}, FAANG: {faang_alias}'
-
-            project = faang_model.get('Project')
-            if not project:
-                return f'Error: Missing Project in FAANG record {record_number}'
-
-            secondary_project = faang_model.get('Secondary Project')
-            assay_type = faang_model.get('Assay Type')
-            if not assay_type:
-                return f'Error: Missing Assay Type in FAANG record {record_number}'
-
-            analysis_protocol = faang_model.get('Analysis Protocol')
-            if not analysis_protocol:
-                return f'Error: Missing Analysis Protocol in FAANG record {record_number}'
-
-            analysis_code = faang_model.get('Analysis Code')
-            reference_genome = faang_model.get('Reference Genome')
-
-            # Create ANALYSIS element
-            analysis_elt = etree.SubElement(analysis_set, 'ANALYSIS', alias=alias)
-
-            # Add title if present
-            if title and title.strip():
-                etree.SubElement(analysis_elt, 'TITLE').text = title
-
-            # Add description if present
-            if description and description.strip():
-                etree.SubElement(analysis_elt, 'DESCRIPTION').text = description
-
-            # Add study reference
-            etree.SubElement(analysis_elt, 'STUDY_REF', accession=study)
-
-            # Add sample references if present
-            if samples:
-                for sample in samples:
-                    if sample and (isinstance(sample, str) and sample.strip() or sample):
-                        sample_value = sample if isinstance(sample, str) else str(sample)
-                        etree.SubElement(analysis_elt, 'SAMPLE_REF', accession=sample_value)
-
-            # Add experiment references if present
-            if experiments:
-                for experiment in experiments:
-                    if experiment and (isinstance(experiment, str) and experiment.strip() or experiment):
-                        exp_value = experiment if isinstance(experiment, str) else str(experiment)
-                        etree.SubElement(analysis_elt, 'EXPERIMENT_REF', accession=exp_value)
-
-            # Add run references if present
-            if runs:
-                for run in runs:
-                    if run and (isinstance(run, str) and run.strip() or run):
-                        run_value = run if isinstance(run, str) else str(run)
-                        etree.SubElement(analysis_elt, 'RUN_REF', accession=run_value)
-
-            # Add related analysis references if present
-            if related_analyses:
-                if isinstance(related_analyses, list):
-                    for analysis in related_analyses:
-                        if analysis and (isinstance(analysis, str) and analysis.strip() or analysis):
-                            analysis_value = analysis if isinstance(analysis, str) else str(analysis)
-                            etree.SubElement(analysis_elt, 'ANALYSIS_REF', accession=analysis_value)
-                elif isinstance(related_analyses, str) and related_analyses.strip():
-                    etree.SubElement(analysis_elt, 'ANALYSIS_REF', accession=related_analyses)
-
-            # Add analysis type
-            analysis_type_elt = etree.SubElement(analysis_elt, 'ANALYSIS_TYPE')
-            etree.SubElement(analysis_type_elt, analysis_type)
-
-            # Add files
-            files_elt = etree.SubElement(analysis_elt, 'FILES')
-            for index, file_name in enumerate(file_names):
-                filename = file_name if isinstance(file_name, str) else str(file_name)
-                filetype = file_types[index] if isinstance(file_types[index], str) else str(file_types[index])
-                checksum_method = checksum_methods[index] if isinstance(checksum_methods[index], str) else str(
-                    checksum_methods[index])
-                checksum = checksums[index] if isinstance(checksums[index], str) else str(checksums[index])
-
-                etree.SubElement(
-                    files_elt, 'FILE',
-                    filename=filename,
-                    filetype=filetype,
-                    checksum_method=checksum_method,
-                    checksum=checksum
-                )
-
-            # Add analysis attributes
-            analysis_attributes_elt = etree.SubElement(analysis_elt, 'ANALYSIS_ATTRIBUTES')
-
-            # Project (required)
-            analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-            etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Project'
-            etree.SubElement(analysis_attribute_elt, 'VALUE').text = project
-
-            # Secondary Project (optional)
-            if secondary_project is not None and secondary_project != "":
-                if isinstance(secondary_project, list):
-                    for item in secondary_project:
-                        if item and (isinstance(item, str) and item.strip() or item):
-                            item_value = item if isinstance(item, str) else str(item)
-                            analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-                            etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Secondary Project'
-                            etree.SubElement(analysis_attribute_elt, 'VALUE').text = item_value
-                elif isinstance(secondary_project, str) and secondary_project.strip():
-                    analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-                    etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Secondary Project'
-                    etree.SubElement(analysis_attribute_elt, 'VALUE').text = secondary_project
-
-            # Assay Type (required)
-            analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-            etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Assay Type'
-            etree.SubElement(analysis_attribute_elt, 'VALUE').text = assay_type
-
-            # Analysis Protocol (required)
-            analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-            etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Analysis Protocol'
-            etree.SubElement(analysis_attribute_elt, 'VALUE').text = analysis_protocol
-
-            # Analysis code (optional)
-            if analysis_code and analysis_code.strip():
-                analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-                etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Analysis code'
-                etree.SubElement(analysis_attribute_elt, 'VALUE').text = analysis_code
-
-            # Reference genome (optional)
-            if reference_genome and reference_genome.strip():
-                analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-                etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Reference genome'
-                etree.SubElement(analysis_attribute_elt, 'VALUE').text = reference_genome
-
-            # Analysis center (optional)
-            if analysis_center and analysis_center.strip():
-                analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-                etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Analysis center'
-                etree.SubElement(analysis_attribute_elt, 'VALUE').text = analysis_center
-
-            # Analysis date (optional)
-            if analysis_date and analysis_date.strip():
-                analysis_attribute_elt = etree.SubElement(analysis_attributes_elt, 'ANALYSIS_ATTRIBUTE')
-                etree.SubElement(analysis_attribute_elt, 'TAG').text = 'Analysis date'
-                etree.SubElement(analysis_attribute_elt, 'VALUE').text = analysis_date
-                if analysis_date_unit and analysis_date_unit.strip():
-                    etree.SubElement(analysis_attribute_elt, 'UNITS').text = analysis_date_unit
+        chunks = _analysis_xml_chunks(record_models)
+        if return_bytes:
+            return b''.join(chunks)
 
         # Generate output filename if not provided
         if output_filename is None:
             output_filename = f"{uuid.uuid4()}_analysis.xml"
 
-        # Write XML file
-        analysis_xml.write(
-            output_filename,
-            pretty_print=True,
-            xml_declaration=True,
-            encoding='UTF-8'
-        )
+        # Write each ANALYSIS element as soon as it is rendered instead of holding the document
+        try:
+            with open(output_filename, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except Exception:
+            # don't leave a truncated document behind
+            Path(output_filename).unlink(missing_ok=True)
+            raise
 
         return output_filename
 
@@ -262,7 +333,7 @@ def generate_analysis_xml(json_data: Dict[str, Any], output_filename: Optional[s
 
 
 def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None,
-                            action: str = "submission") -> str:
+                            action: str = "submission", return_bytes: bool = False) -> Union[str, bytes]:
     """
     Generate submission XML file from JSON data.
 
@@ -297,9 +368,11 @@ def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional
                         generates a UUID-based filename.
         action: 'submission' (default) or 'update'
         room_id: Optional room ID for file naming. If not provided, uses UUID.
+        return_bytes: Return the XML document as bytes instead of writing it to a file.
 
     Returns:
-        str: Path to the generated XML file, or 'Error: ...' if there was an error.
+        str: Path to the generated XML file (or the document bytes when return_bytes is set),
+        or 'Error: ...' if there was an error.
     """
     try:
         # Get submission data from JSON structure
@@ -318,12 +391,10 @@ def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional
         if not submission_records:
             return 'Error: No valid submission records found in JSON data'
 
-        # Create XML structure
-        submission_set = etree.Element('SUBMISSION_SET')
-        submission_xml = etree.ElementTree(submission_set)
-
-        if output_filename is None:
-            output_filename = f"{uuid.uuid4()}_submission.xml"
+        # Fixed-shape document: fill the per-record template instead of building a tree
+        # For submission (public), ADD is followed by an immediate RELEASE
+        template = _SUBMISSION_UPDATE_TEMPLATE if action == 'update' else _SUBMISSION_ADD_TEMPLATE
+        out = []
 
         # Process each submission record
         for record in submission_records:
@@ -337,27 +408,18 @@ def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional
                 if not alias:
                     return 'Error: Missing Alias in submission record'
 
-            # Create SUBMISSION element
-            submission_elt = etree.SubElement(submission_set, 'SUBMISSION', alias=alias)
-            actions_elt = etree.SubElement(submission_elt, 'ACTIONS')
-            action_elt = etree.SubElement(actions_elt, 'ACTION')
+            out.append(template.format(alias=_xml_attr(alias)))
+
+        document = b''.join((_SUBMISSION_SET_OPEN, ''.join(out).encode('utf-8'), _SUBMISSION_SET_CLOSE))
+        if return_bytes:
+            return document
 
-            if action == 'update':
-                etree.SubElement(action_elt, 'MODIFY')
-            else:
-                # For submission (public), add ADD and RELEASE actions
-                etree.SubElement(action_elt, 'ADD')
-                # Release immediately in case of public submission
-                action_elt = etree.SubElement(actions_elt, 'ACTION')
-                etree.SubElement(action_elt, 'RELEASE')
+        if output_filename is None:
+            output_filename = f"{uuid.uuid4()}_submission.xml"
 
         # Write XML file
-        submission_xml.write(
-            output_filename,
-            pretty_print=True,
-            xml_declaration=True,
-            encoding='UTF-8'
-        )
+        with open(output_filename, 'wb') as f:
+            f.write(document)
 
         return output_filename
 
@@ -1,227 +1,142 @@
 from lxml import etree
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
+import orjson
 import uuid
 import datetime
 import re
 import os
 from pathlib import Path
 
+# ENA run dates: YYYY, YYYY-MM or YYYY-MM-DD
+_RUN_DATE_RE = re.compile(r'(\d{4})(?:-(\d{2}))?(?:-(\d{2}))?')
+
+# unit field pairs (main_field, unit_field)
+_UNIT_FIELD_PAIRS = (
+    ("Sampling to Preparation Interval", "Unit"),
+    ("Library Preparation Location Longitude", "Library Preparation Location Longitude Unit"),
+    ("Library Preparation Location Latitude", "Library Preparation Location Latitude Unit"),
+    ("Library Preparation Date", "Library Preparation Date Unit"),
+    ("Sequencing Location Longitude", "Sequencing Location Longitude Unit"),
+    ("Sequencing Location Latitude", "Sequencing Location Latitude Unit"),
+    ("Sequencing Date", "Sequencing Date Unit"),
+)
+
+# ontology field pairs (main_field, term_field)
+_ONTOLOGY_FIELD_PAIRS = (
+    ("Experiment Target", "Term Source ID"),
+    ("ChIP Target", "ChIP Target Term Source ID"),
+)
+
+_UNIT_FIELDS = dict(_UNIT_FIELD_PAIRS)
+_ONTOLOGY_TERM_FIELDS = dict(_ONTOLOGY_FIELD_PAIRS)
+# unit/term field -> the main field it is written with
+_PAIRED_FIELD_MAINS = {partner: main for main, partner in _UNIT_FIELD_PAIRS + _ONTOLOGY_FIELD_PAIRS}
+
+# structural fields that are not written as EXPERIMENT_ATTRIBUTEs
+_EXCLUDED_ATTRIBUTE_FIELDS = frozenset({'Experiment Alias', 'Sample Descriptor'})
+
+# FAANG experiment types, in the order their results are searched
+_EXPERIMENT_TYPES = (
+    'atac-seq', 'bs-seq', 'cage-seq', 'chip-seq dna-binding proteins',
+    'chip-seq input dna', 'dnase-seq', 'em-seq', 'hi-c', 'rna-seq',
+    'scrna-seq', 'snatac-seq', 'wgs',
+)
+
+
+def get_xml_files(json_data: Union[Dict[str, Any], str, bytes], submission_id: Optional[str] = None,
+                  action: str = "submission"):
+    # accept an already-serialized payload without a stdlib json round trip
+    if isinstance(json_data, (str, bytes, bytearray, memoryview)):
+        try:
+            json_data = orjson.loads(json_data)
+        except orjson.JSONDecodeError as e:
+            return f'Error: Invalid JSON data: {str(e)}', None, None, None
 
-def get_xml_files(json_data: Dict[str, Any], submission_id: Optional[str] = None, action: str = "submission"):
     # create XMLs directory if it doesn't exist
     xml_dir = Path("XMLs")
     xml_dir.mkdir(exist_ok=True)
 
-    if submission_id:
-        experiment_filename = f"XMLs/{submission_id}_experiment.xml"
-        run_filename = f"XMLs/{submission_id}_run.xml"
-        study_filename = f"XMLs/{submission_id}_study.xml"
-        submission_filename = f"XMLs/{submission_id}_submission.xml"
-    else:
-        unique_id = str(uuid.uuid4())
-        experiment_filename = f"XMLs/{unique_id}_experiment.xml"
-        run_filename = f"XMLs/{unique_id}_run.xml"
-        study_filename = f"XMLs/{unique_id}_study.xml"
-        submission_filename = f"XMLs/{unique_id}_submission.xml"
-    
-    # Generate XML files
-    experiment_result = generate_experiment_xml(json_data, experiment_filename)
-    if experiment_result.startswith('Error:'):
-        return experiment_result, None, None, None
-    
-    run_result = generate_run_xml(json_data, run_filename)
-    if run_result.startswith('Error:'):
-        return experiment_result, run_result, None, None
+    # one id for all four files, so the generators never fall back to their own uuid
+    file_id = submission_id or str(uuid.uuid4())
+    experiment_filename = f"XMLs/{file_id}_experiment.xml"
+    run_filename = f"XMLs/{file_id}_run.xml"
+    study_filename = f"XMLs/{file_id}_study.xml"
+    submission_filename = f"XMLs/{file_id}_submission.xml"
     
-    study_result = generate_study_xml(json_data, study_filename)
-    if study_result.startswith('Error:'):
-        return experiment_result, run_result, study_result, None
+    # Generate XML files in order, stopping at the first error
+    steps = (
+        (generate_experiment_xml, (json_data, experiment_filename)),
+        (generate_run_xml, (json_data, run_filename)),
+        (generate_study_xml, (json_data, study_filename)),
+        (generate_submission_xml, (json_data, submission_filename, action)),
+    )
+    results = [None, None, None, None]
+    for i, (generate, args) in enumerate(steps):
+        results[i] = generate(*args)
+        if results[i].startswith('Error:'):
+            break
     
-    submission_result = generate_submission_xml(json_data, submission_filename, action=action)
-    if submission_result.startswith('Error:'):
-        return experiment_result, run_result, study_result, submission_result
-    
-    return experiment_result, run_result, study_result, submission_result
-
-
-def convert_unit_fields_to_dicts(model: Dict[str, Any]) -> Dict[str, Any]:
-    # unit field pairs (main_field, unit_field)
-    UNIT_FIELD_PAIRS = [
-        ("Sampling to Preparation Interval", "Unit"),
-        ("Library Preparation Location Longitude", "Library Preparation Location Longitude Unit"),
-        ("Library Preparation Location Latitude", "Library Preparation Location Latitude Unit"),
-        ("Library Preparation Date", "Library Preparation Date Unit"),
-        ("Sequencing Location Longitude", "Sequencing Location Longitude Unit"),
-        ("Sequencing Location Latitude", "Sequencing Location Latitude Unit"),
-        ("Sequencing Date", "Sequencing Date Unit"),
-    ]
-
-    converted = dict(model)
-
-    for main_field, unit_field in UNIT_FIELD_PAIRS:
-        if main_field in converted and unit_field in converted:
-            value = converted[main_field]
-            units = converted[unit_field]
-
-            converted[main_field] = {
-                "value": value,
-                "units": units
-            }
-
-            del converted[unit_field]
+    return tuple(results)
 
-    return converted
 
-def convert_ontology_fields_to_dicts(model: Dict[str, Any]) -> Dict[str, Any]:
-    # ontology field pairs (main_field, term_field)
-    ONTOLOGY_FIELD_PAIRS = [
-        ("Experiment Target", "Term Source ID"),
-        ("ChIP Target", "ChIP Target Term Source ID"),
-    ]
+def _valid_records(results) -> list:
+    # the 'valid' list of one validation result; missing or malformed results have none
+    return (results.get('valid') or []) if isinstance(results, dict) else []
 
-    converted = dict(model)
 
-    for main_field, term_field in ONTOLOGY_FIELD_PAIRS:
-        if main_field in converted and term_field in converted:
-            # get the text and term values
-            text_value = converted[main_field]
-            term_value = converted[term_field]
+def _write_xml(root, output_filename: str, pretty: bool = False):
+    # serialize once and write in one call; pretty printing only doubles the work for ENA
+    data = etree.tostring(root, pretty_print=pretty, xml_declaration=True, encoding='UTF-8')
+    with open(output_filename, 'wb') as f:
+        f.write(data)
 
-            converted[main_field] = {
-                "text": text_value,
-                "term": term_value
-            }
 
-            del converted[term_field]
-
-    return converted
-
-def generate_experiment_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None) -> str:
+def _stream_xml(output_filename: str, set_tag: str, records, build_element, pretty: bool = False) -> Optional[str]:
+    # write each record's element as soon as it is built instead of holding the whole set;
+    # build_element returns (error, element) and the first error stops the document
+    error = None
+    try:
+        with etree.xmlfile(output_filename, encoding='UTF-8') as xf:
+            xf.write_declaration()
+            with xf.element(set_tag):
+                for record in records:
+                    error, element = build_element(record)
+                    if error:
+                        break
+                    xf.write(element, pretty_print=pretty)
+    except Exception:
+        # don't leave a truncated document behind
+        Path(output_filename).unlink(missing_ok=True)
+        raise
+
+    if error:
+        Path(output_filename).unlink(missing_ok=True)
+    return error
+
+
+def generate_experiment_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None,
+                            pretty: bool = False) -> str:
     try:
         # Get experiment ena data (ENA-specific metadata)
-        experiment_results = json_data.get('experiment_results', {})
-        ena_data = experiment_results.get('experiment ena', {})
-        ena_records = ena_data.get('valid', []) if isinstance(ena_data, dict) else []
+        experiment_results = json_data.get('experiment_results') or {}
+        ena_records = _valid_records(experiment_results.get('experiment ena'))
         
         if not ena_records:
             return 'Error: No valid experiment ena records found in JSON data'
         
-        # Create XML structure
-        experiment_set = etree.Element('EXPERIMENT_SET')
-        experiment_xml = etree.ElementTree(experiment_set)
-        
-        # Process each experiment ena record
-        for record in ena_records:
-            model = record.get('model', {})
-            
-            # Extract ENA fields
-            alias = model.get('Experiment Alias')
-            if not alias:
-                return 'Error: Missing Experiment Alias in experiment ena record'
-            
-            title = model.get('Title')
-            study_ref = model.get('Study Ref')
-            if not study_ref:
-                return f'Error: Missing Study Ref in experiment {alias}'
-            
-            design_description = model.get('Design Description')
-            if not design_description:
-                return f'Error: Missing Design Description in experiment {alias}'
-            
-            sample_descriptor = model.get('Sample Descriptor')
-            if not sample_descriptor:
-                return f'Error: Missing Sample Descriptor in experiment {alias}'
-            
-            library_name = model.get('Library Name')
-            library_strategy = model.get('Library Strategy')
-            if not library_strategy:
-                return f'Error: Missing Library Strategy in experiment {alias}'
-            
-            library_source = model.get('Library Source')
-            if not library_source:
-                return f'Error: Missing Library Source in experiment {alias}'
-            
-            library_selection = model.get('Library Selection')
-            if not library_selection:
-                return f'Error: Missing Library Selection in experiment {alias}'
-            
-            library_layout = model.get('Library Layout')
-            if not library_layout:
-                return f'Error: Missing Library Layout in experiment {alias}'
-            
-            nominal_length = model.get('Nominal Length')
-            library_construction_protocol = model.get('Library Construction Protocol')
-            platform = model.get('Platform')
-            if not platform:
-                return f'Error: Missing Platform in experiment {alias}'
-            
-            instrument_model = model.get('Instrument Model')
-            
-            # Create EXPERIMENT element
-            experiment_elt = etree.SubElement(experiment_set, 'EXPERIMENT', alias=alias)
-            
-            if title and title.strip():
-                etree.SubElement(experiment_elt, 'TITLE').text = title
-            
-            etree.SubElement(experiment_elt, 'STUDY_REF', refname=study_ref)
-            
-            # Design section
-            design_elt = etree.SubElement(experiment_elt, 'DESIGN')
-            etree.SubElement(design_elt, 'DESIGN_DESCRIPTION').text = design_description
-            etree.SubElement(design_elt, 'SAMPLE_DESCRIPTOR', refname=sample_descriptor)
-            
-            # Library descriptor
-            library_descriptor_elt = etree.SubElement(design_elt, 'LIBRARY_DESCRIPTOR')
-            
-            if library_name and library_name.strip():
-                etree.SubElement(library_descriptor_elt, 'LIBRARY_NAME').text = library_name
-            
-            etree.SubElement(library_descriptor_elt, 'LIBRARY_STRATEGY').text = library_strategy
-            etree.SubElement(library_descriptor_elt, 'LIBRARY_SOURCE').text = library_source
-            etree.SubElement(library_descriptor_elt, 'LIBRARY_SELECTION').text = library_selection
-            
-            # Library layout
-            library_layout_elt = etree.SubElement(library_descriptor_elt, 'LIBRARY_LAYOUT')
-            if nominal_length and str(nominal_length).strip() and nominal_length != "":
-                try:
-                    nominal_length_int = int(float(nominal_length))
-                    etree.SubElement(library_layout_elt, library_layout, 
-                                   NOMINAL_LENGTH=str(nominal_length_int))
-                except (ValueError, TypeError):
-                    etree.SubElement(library_layout_elt, library_layout)
-            else:
-                etree.SubElement(library_layout_elt, library_layout)
-            
-            if library_construction_protocol and library_construction_protocol.strip():
-                etree.SubElement(library_descriptor_elt, 
-                               'LIBRARY_CONSTRUCTION_PROTOCOL').text = library_construction_protocol
-            
-            # Platform
-            platform_elt = etree.SubElement(experiment_elt, 'PLATFORM')
-            platform_desc_elt = etree.SubElement(platform_elt, platform)
-            if instrument_model and instrument_model.strip():
-                etree.SubElement(platform_desc_elt, 'INSTRUMENT_MODEL').text = instrument_model
-            
-            # FAANG attributes - find matching FAANG experiment
-            faang_experiment = find_faang_experiment(experiment_results, alias)
-            if not faang_experiment:
-                return f"Error: No FAANG data found for experiment {alias}"
-            
-            # Add FAANG attributes
-            experiment_attributes_elt = etree.SubElement(experiment_elt, 'EXPERIMENT_ATTRIBUTES')
-            parse_faang_experiment(faang_experiment, experiment_attributes_elt)
+        # FAANG records by alias, built once instead of rescanned per experiment
+        faang_experiments = index_faang_experiments(experiment_results)
         
         # Generate output filename if not provided
         if output_filename is None:
             output_filename = f"{uuid.uuid4()}_experiment.xml"
         
-        # Write XML file
-        experiment_xml.write(
-            output_filename,
-            pretty_print=True,
-            xml_declaration=True,
-            encoding='UTF-8'
-        )
+        # Write XML file, one EXPERIMENT at a time
+        error = _stream_xml(output_filename, 'EXPERIMENT_SET', ena_records,
+                            lambda record: _build_experiment_element(record, faang_experiments),
+                            pretty=pretty)
+        if error:
+            return error
         
         return output_filename
     
@@ -231,6 +146,126 @@ def generate_experiment_xml(json_data: Dict[str, Any], output_filename: Optional
         return f'Error: Failed to generate experiment XML: {str(e)}'
 
 
+def _build_experiment_element(record: Dict[str, Any], faang_experiments: Dict[str, Dict[str, Any]]):
+    """Build one detached EXPERIMENT element; returns (error, element)."""
+    SE = etree.SubElement
+    model = record.get('model', {})
+    
+    # Extract ENA fields
+    alias = model.get('Experiment Alias')
+    if not alias:
+        return 'Error: Missing Experiment Alias in experiment ena record', None
+    
+    title = model.get('Title')
+    study_ref = model.get('Study Ref')
+    if not study_ref:
+        return f'Error: Missing Study Ref in experiment {alias}', None
+    
+    design_description = model.get('Design Description')
+    if not design_description:
+        return f'Error: Missing Design Description in experiment {alias}', None
+    
+    sample_descriptor = model.get('Sample Descriptor')
+    if not sample_descriptor:
+        return f'Error: Missing Sample Descriptor in experiment {alias}', None
+    
+    library_name = model.get('Library Name')
+    library_strategy = model.get('Library Strategy')
+    if not library_strategy:
+        return f'Error: Missing Library Strategy in experiment {alias}', None
+    
+    library_source = model.get('Library Source')
+    if not library_source:
+        return f'Error: Missing Library Source in experiment {alias}', None
+    
+    library_selection = model.get('Library Selection')
+    if not library_selection:
+        return f'Error: Missing Library Selection in experiment {alias}', None
+    
+    library_layout = model.get('Library Layout')
+    if not library_layout:
+        return f'Error: Missing Library Layout in experiment {alias}', None
+    
+    nominal_length = model.get('Nominal Length')
+    library_construction_protocol = model.get('Library Construction Protocol')
+    platform = model.get('Platform')
+    if not platform:
+        return f'Error: Missing Platform in experiment {alias}', None
+    
+    instrument_model = model.get('Instrument Model')
+    
+    # Create EXPERIMENT element
+    experiment_elt = etree.Element('EXPERIMENT', alias=alias)
+    
+    # optional text is stripped once and written stripped
+    title = title.strip() if title else None
+    if title:
+        SE(experiment_elt, 'TITLE').text = title
+    
+    SE(experiment_elt, 'STUDY_REF', refname=study_ref)
+    
+    # Design section
+    design_elt = SE(experiment_elt, 'DESIGN')
+    SE(design_elt, 'DESIGN_DESCRIPTION').text = design_description
+    SE(design_elt, 'SAMPLE_DESCRIPTOR', refname=sample_descriptor)
+    
+    # Library descriptor
+    library_descriptor_elt = SE(design_elt, 'LIBRARY_DESCRIPTOR')
+    
+    library_name = library_name.strip() if library_name else None
+    if library_name:
+        SE(library_descriptor_elt, 'LIBRARY_NAME').text = library_name
+    
+    SE(library_descriptor_elt, 'LIBRARY_STRATEGY').text = library_strategy
+    SE(library_descriptor_elt, 'LIBRARY_SOURCE').text = library_source
+    SE(library_descriptor_elt, 'LIBRARY_SELECTION').text = library_selection
+    
+    # Library layout
+    library_layout_elt = SE(library_descriptor_elt, 'LIBRARY_LAYOUT')
+    nominal_length_int = None
+    if nominal_length and str(nominal_length).strip():
+        nominal_length_int = _parse_nominal_length(nominal_length)
+    if nominal_length_int is not None:
+        SE(library_layout_elt, library_layout, NOMINAL_LENGTH=str(nominal_length_int))
+    else:
+        SE(library_layout_elt, library_layout)
+    
+    library_construction_protocol = library_construction_protocol.strip() if library_construction_protocol else None
+    if library_construction_protocol:
+        SE(library_descriptor_elt, 'LIBRARY_CONSTRUCTION_PROTOCOL').text = library_construction_protocol
+    
+    # Platform
+    platform_elt = SE(experiment_elt, 'PLATFORM')
+    platform_desc_elt = SE(platform_elt, platform)
+    instrument_model = instrument_model.strip() if instrument_model else None
+    if instrument_model:
+        SE(platform_desc_elt, 'INSTRUMENT_MODEL').text = instrument_model
+    
+    # FAANG attributes - find matching FAANG experiment
+    faang_experiment = faang_experiments.get(alias)
+    if not faang_experiment:
+        return f"Error: No FAANG data found for experiment {alias}", None
+    
+    # Add FAANG attributes
+    experiment_attributes_elt = SE(experiment_elt, 'EXPERIMENT_ATTRIBUTES')
+    parse_faang_experiment(faang_experiment, experiment_attributes_elt)
+    
+    return None, experiment_elt
+
+
+def _parse_nominal_length(nominal_length) -> Optional[int]:
+    # whole numbers (the usual input) skip the float round trip; None if not a number
+    try:
+        value_type = type(nominal_length)
+        if value_type is int:
+            return nominal_length
+        if value_type is str and nominal_length.strip().isdigit():
+            return int(nominal_length)
+        return int(float(nominal_length))
+    except (ValueError, TypeError):
+        return None
+
+
 def find_faang_experiment(experiment_results: Dict[str, Any], experiment_alias: str) -> Optional[Dict[str, Any]]:
     """
     Find the FAANG experiment record matching the given experiment alias.
@@ -242,63 +277,97 @@ def find_faang_experiment(experiment_results: Dict[str, Any], experiment_alias:
     Returns:
         Dict containing the FAANG experiment data, or None if not found
     """
+    return index_faang_experiments(experiment_results).get(experiment_alias)
+
+
+def index_faang_experiments(experiment_results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Map each FAANG experiment alias to its record, scanning the results once.
+    
+    Args:
+        experiment_results: All experiment validation results
+    
+    Returns:
+        Dict of alias -> {'model': ..., 'experiment_type': ...}; the first
+        record found for an alias wins, as with find_faang_experiment
+    """
+    index = {}
     # Check all experiment types
-    experiment_types = [
-        'atac-seq', 'bs-seq', 'cage-seq', 'chip-seq dna-binding proteins', 
-        'chip-seq input dna', 'dnase-seq', 'em-seq', 'hi-c', 'rna-seq', 
-        'scrna-seq', 'snatac-seq', 'wgs'
-    ]
-    
-    for exp_type in experiment_types:
-        if exp_type not in experiment_results:
-            continue
-        
-        exp_data = experiment_results[exp_type]
-        if not isinstance(exp_data, dict):
+    for exp_type in _EXPERIMENT_TYPES:
+        exp_data = experiment_results.get(exp_type)
+        if not exp_data or not isinstance(exp_data, dict):
             continue
         
         valid_records = exp_data.get('valid', [])
         for record in valid_records:
             model = record.get('model', {})
-            if model.get('Experiment Alias') == experiment_alias:
-                # Return both model and experiment type
-                return {
+            experiment_alias = model.get('Experiment Alias')
+            # ENA aliases are strings, so nothing else can ever match
+            if isinstance(experiment_alias, str) and experiment_alias not in index:
+                # Keep both model and experiment type
+                index[experiment_alias] = {
                     'model': model,
                     'experiment_type': exp_type
                 }
     
-    return None
+    return index
 
 
 def parse_faang_experiment(faang_data: Dict[str, Any], experiment_attributes_elt):
     model = faang_data.get('model', {})
 
-    model = convert_ontology_fields_to_dicts(model)
-    model = convert_unit_fields_to_dicts(model)
-    
-    # Exclude these fields from attributes (structural fields)
-    excluded_fields = {'Experiment Alias', 'Sample Descriptor'}
-    
+    SE = etree.SubElement
+
+    for tag_name, value, units in _experiment_attributes(model):
+        experiment_attribute_elt = SE(experiment_attributes_elt, 'EXPERIMENT_ATTRIBUTE')
+        SE(experiment_attribute_elt, 'TAG').text = tag_name
+        SE(experiment_attribute_elt, 'VALUE').text = value
+        if units:
+            SE(experiment_attribute_elt, 'UNITS').text = units
+
+
+def _experiment_attributes(model: Dict[str, Any]) -> List[Tuple[str, str, Optional[str]]]:
+    """Flatten a FAANG model into (tag, value, units) rows, in field order."""
+    attributes = []
+    append = attributes.append
+
     for field_name, field_value in model.items():
-        if field_name in excluded_fields or field_value is None:
+        if field_name in _EXCLUDED_ATTRIBUTE_FIELDS or field_value is None:
+            continue
+        
+        # unit/term fields are written with their main field
+        main_field = _PAIRED_FIELD_MAINS.get(field_name)
+        if main_field is not None and main_field in model:
             continue
         
         # Convert field name to tag format (Title Case with spaces)
         tag_name = field_name.lower().replace("'", "")
         
-        # Handle different field value types
-        if isinstance(field_value, list):
+        # ontology term fields (e.g., chip target, Experiment Target): the term itself is not written
+        term_field = _ONTOLOGY_TERM_FIELDS.get(field_name)
+        if term_field is not None and term_field in model:
+            if field_value:
+                append((tag_name, str(field_value), None))
+            continue
+        
+        # fields with units (e.g., Sequencing Date)
+        unit_field = _UNIT_FIELDS.get(field_name)
+        if unit_field is not None and unit_field in model:
+            if field_value:
+                units = model[unit_field]
+                append((tag_name, str(field_value), str(units) if units else None))
+            continue
+        
+        # Handle different field value types (JSON gives plain lists/dicts)
+        value_type = type(field_value)
+        if value_type is list:
             # Handle list fields (e.g., Secondary Project)
             for item in field_value:
                 if item and (isinstance(item, str) and item.strip() or item):
-                    experiment_attribute_elt = etree.SubElement(
-                        experiment_attributes_elt, 'EXPERIMENT_ATTRIBUTE')
-                    etree.SubElement(experiment_attribute_elt, 'TAG').text = tag_name
-                    etree.SubElement(experiment_attribute_elt, 'VALUE').text = str(item)
-        elif isinstance(field_value, dict):
-            # ontology term fields (e.g., chip target, Experiment Target)
+                    append((tag_name, str(item), None))
+        elif value_type is dict:
+            # pre-built {'text', 'term'} / {'value', 'units'} values
             text_value = field_value.get('text', '')
-            term_value = field_value.get('term', '')
 
             value = field_value.get('value', '')
             units = field_value.get('units', '')
@@ -310,21 +379,14 @@ def parse_faang_experiment(faang_data: Dict[str, Any], experiment_attributes_elt
             else:
                 continue
 
-            experiment_attribute_elt = etree.SubElement(
-                experiment_attributes_elt, 'EXPERIMENT_ATTRIBUTE')
-            etree.SubElement(experiment_attribute_elt, 'TAG').text = tag_name
-            etree.SubElement(experiment_attribute_elt, 'VALUE').text = str(final_value)
-
-            if units:
-                etree.SubElement(experiment_attribute_elt, 'UNITS').text = str(units)
+            append((tag_name, str(final_value), str(units) if units else None))
 
         else:
             # Handle simple string/numeric fields
             if field_value and (isinstance(field_value, str) and field_value.strip() or field_value):
-                experiment_attribute_elt = etree.SubElement(
-                    experiment_attributes_elt, 'EXPERIMENT_ATTRIBUTE')
-                etree.SubElement(experiment_attribute_elt, 'TAG').text = tag_name
-                etree.SubElement(experiment_attribute_elt, 'VALUE').text = str(field_value)
+                append((tag_name, str(field_value), None))
+
+    return attributes
 
 
 def add_leading_zero(date_item: int) -> str:
@@ -335,138 +397,33 @@ def add_leading_zero(date_item: int) -> str:
         return str(date_item)
 
 
-def generate_run_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None) -> str:
+def generate_run_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None, pretty: bool = False) -> str:
     """
     Generate run XML file from JSON data.
     
     Args:
         json_data: Dictionary containing run validation results
         output_filename: Optional filename for the XML file
+        pretty: Indent the output (for debugging; ENA does not need it)
     
     Returns:
         str: Path to the generated XML file, or 'Error: ...' if there was an error
     """
     try:
         # Get run data
-        metadata_results = json_data.get('metadata_results', {})
-        run_data = metadata_results.get('run', {})
-        run_records = run_data.get('valid', []) if isinstance(run_data, dict) else []
+        run_records = _valid_records((json_data.get('metadata_results') or {}).get('run'))
         
         if not run_records:
             return 'Error: No valid run records found in JSON data'
         
-        # Create XML structure
-        run_set = etree.Element('RUN_SET')
-        run_xml = etree.ElementTree(run_set)
-        
-        # Process each run record
-        for record in run_records:
-            model = record.get('model', {})
-            
-            # Extract fields
-            run_alias = model.get('Alias')
-            if not run_alias:
-                return 'Error: Missing Alias in run record'
-            
-            run_center = model.get('Run Center')
-            if not run_center:
-                return f'Error: Missing Run Center in run {run_alias}'
-            
-            run_date = model.get('Run Date')
-            experiment_ref = model.get('Experiment Ref')
-            if not experiment_ref:
-                return f'Error: Missing Experiment Ref in run {run_alias}'
-            
-            filename = model.get('Filename')
-            if not filename:
-                return f'Error: Missing Filename in run {run_alias}'
-            
-            filetype = model.get('Filetype')
-            if not filetype:
-                return f'Error: Missing Filetype in run {run_alias}'
-            
-            checksum_method = model.get('Checksum Method')
-            if not checksum_method:
-                return f'Error: Missing Checksum Method in run {run_alias}'
-            
-            checksum = model.get('Checksum')
-            if not checksum:
-                return f'Error: Missing Checksum in run {run_alias}'
-            
-            # Check for paired-end data
-            filename_pair = model.get('Filename Pair')
-            filetype_pair = model.get('Filetype Pair')
-            checksum_method_pair = model.get('Checksum Method Pair')
-            checksum_pair = model.get('Checksum Pair')
-            
-            paired = all([filename_pair, filetype_pair, checksum_method_pair, checksum_pair])
-            
-            # Parse run date if present
-            run_date_iso = None
-            if run_date and run_date.strip():
-                try:
-                    # Try different date formats
-                    if re.match(r'^\d{4}-\d{2}-\d{2}$', run_date):
-                        run_date_iso = datetime.datetime.strptime(run_date, '%Y-%m-%d').isoformat()
-                    elif re.match(r'^\d{4}-\d{2}$', run_date):
-                        run_date_iso = datetime.datetime.strptime(run_date, '%Y-%m').isoformat()
-                    elif re.match(r'^\d{4}$', run_date):
-                        run_date_iso = datetime.datetime.strptime(run_date, '%Y').isoformat()
-                except (ValueError, AttributeError):
-                    # If parsing fails, skip the date
-                    pass
-            
-            # Create RUN element
-            if run_date_iso:
-                run_elt = etree.SubElement(
-                    run_set, 'RUN', 
-                    alias=run_alias, 
-                    run_center=run_center,
-                    run_date=run_date_iso
-                )
-            else:
-                run_elt = etree.SubElement(
-                    run_set, 'RUN', 
-                    alias=run_alias, 
-                    run_center=run_center
-                )
-            
-            etree.SubElement(run_elt, 'EXPERIMENT_REF', refname=experiment_ref)
-            
-            # Data block with files
-            data_block_elt = etree.SubElement(run_elt, 'DATA_BLOCK')
-            files_elt = etree.SubElement(data_block_elt, 'FILES')
-            
-            # Add first file
-            etree.SubElement(
-                files_elt, 'FILE',
-                filename=filename,
-                filetype=filetype,
-                checksum_method=checksum_method,
-                checksum=checksum
-            )
-            
-            # Add second file if paired
-            if paired:
-                etree.SubElement(
-                    files_elt, 'FILE',
-                    filename=filename_pair,
-                    filetype=filetype_pair,
-                    checksum_method=checksum_method_pair,
-                    checksum=checksum_pair
-                )
-        
         # Generate output filename if not provided
         if output_filename is None:
             output_filename = f"{uuid.uuid4()}_run.xml"
         
-        # Write XML file
-        run_xml.write(
-            output_filename,
-            pretty_print=True,
-            xml_declaration=True,
-            encoding='UTF-8'
-        )
+        # Write XML file, one RUN at a time
+        error = _stream_xml(output_filename, 'RUN_SET', run_records, _build_run_element, pretty=pretty)
+        if error:
+            return error
         
         return output_filename
     
@@ -476,29 +433,127 @@ def generate_run_xml(json_data: Dict[str, Any], output_filename: Optional[str] =
         return f'Error: Failed to generate run XML: {str(e)}'
 
 
-def generate_study_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None) -> str:
+def _build_run_element(record: Dict[str, Any]):
+    """Build one detached RUN element; returns (error, element)."""
+    SE = etree.SubElement
+    model = record.get('model', {})
+    
+    # Extract fields
+    run_alias = model.get('Alias')
+    if not run_alias:
+        return 'Error: Missing Alias in run record', None
+    
+    run_center = model.get('Run Center')
+    if not run_center:
+        return f'Error: Missing Run Center in run {run_alias}', None
+    
+    run_date = model.get('Run Date')
+    experiment_ref = model.get('Experiment Ref')
+    if not experiment_ref:
+        return f'Error: Missing Experiment Ref in run {run_alias}', None
+    
+    filename = model.get('Filename')
+    if not filename:
+        return f'Error: Missing Filename in run {run_alias}', None
+    
+    filetype = model.get('Filetype')
+    if not filetype:
+        return f'Error: Missing Filetype in run {run_alias}', None
+    
+    checksum_method = model.get('Checksum Method')
+    if not checksum_method:
+        return f'Error: Missing Checksum Method in run {run_alias}', None
+    
+    checksum = model.get('Checksum')
+    if not checksum:
+        return f'Error: Missing Checksum in run {run_alias}', None
+    
+    # Check for paired-end data
+    filename_pair = model.get('Filename Pair')
+    filetype_pair = model.get('Filetype Pair')
+    checksum_method_pair = model.get('Checksum Method Pair')
+    checksum_pair = model.get('Checksum Pair')
+    
+    paired = all([filename_pair, filetype_pair, checksum_method_pair, checksum_pair])
+    
+    # Parse run date if present
+    run_date_iso = None
+    if run_date and run_date.strip():
+        date_match = _RUN_DATE_RE.fullmatch(run_date)
+        if date_match:
+            year, month, day = date_match.groups()
+            try:
+                run_date_iso = datetime.datetime(int(year), int(month or 1), int(day or 1)).isoformat()
+            except ValueError:
+                # If parsing fails (e.g. month 13), skip the date
+                pass
+    
+    # Create RUN element
+    if run_date_iso:
+        run_elt = etree.Element(
+            'RUN',
+            alias=run_alias,
+            run_center=run_center,
+            run_date=run_date_iso
+        )
+    else:
+        run_elt = etree.Element(
+            'RUN',
+            alias=run_alias,
+            run_center=run_center
+        )
+    
+    SE(run_elt, 'EXPERIMENT_REF', refname=experiment_ref)
+    
+    # Data block with files
+    data_block_elt = SE(run_elt, 'DATA_BLOCK')
+    files_elt = SE(data_block_elt, 'FILES')
+    
+    # Add first file
+    SE(
+        files_elt, 'FILE',
+        filename=filename,
+        filetype=filetype,
+        checksum_method=checksum_method,
+        checksum=checksum
+    )
+    
+    # Add second file if paired
+    if paired:
+        SE(
+            files_elt, 'FILE',
+            filename=filename_pair,
+            filetype=filetype_pair,
+            checksum_method=checksum_method_pair,
+            checksum=checksum_pair
+        )
+    
+    return None, run_elt
+
+
+def generate_study_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None, pretty: bool = False) -> str:
     """
     Generate study XML file from JSON data.
     
     Args:
         json_data: Dictionary containing study validation results
         output_filename: Optional filename for the XML file
+        pretty: Indent the output (for debugging; ENA does not need it)
     
     Returns:
         str: Path to the generated XML file, or 'Error: ...' if there was an error
     """
     try:
         # Get study data
-        metadata_results = json_data.get('metadata_results', {})
-        study_data = metadata_results.get('study', {})
-        study_records = study_data.get('valid', []) if isinstance(study_data, dict) else []
+        study_records = _valid_records((json_data.get('metadata_results') or {}).get('study'))
         
         if not study_records:
             return 'Error: No valid study records found in JSON data'
         
         # Create XML structure
         study_set = etree.Element('STUDY_SET')
-        study_xml = etree.ElementTree(study_set)
+        
+        SE = etree.SubElement
         
         # Process each study record
         for record in study_records:
@@ -520,26 +575,21 @@ def generate_study_xml(json_data: Dict[str, Any], output_filename: Optional[str]
             study_abstract = model.get('Study Abstract')
             
             # Create STUDY element
-            study_elt = etree.SubElement(study_set, 'STUDY', alias=study_alias)
-            descriptor_elt = etree.SubElement(study_elt, 'DESCRIPTOR')
+            study_elt = SE(study_set, 'STUDY', alias=study_alias)
+            descriptor_elt = SE(study_elt, 'DESCRIPTOR')
             
-            etree.SubElement(descriptor_elt, 'STUDY_TITLE').text = study_title
-            etree.SubElement(descriptor_elt, 'STUDY_TYPE', existing_study_type=study_type)
+            SE(descriptor_elt, 'STUDY_TITLE').text = study_title
+            SE(descriptor_elt, 'STUDY_TYPE', existing_study_type=study_type)
             
             if study_abstract and study_abstract.strip():
-                etree.SubElement(descriptor_elt, 'STUDY_ABSTRACT').text = study_abstract
+                SE(descriptor_elt, 'STUDY_ABSTRACT').text = study_abstract
         
         # Generate output filename if not provided
         if output_filename is None:
             output_filename = f"{uuid.uuid4()}_study.xml"
         
         # Write XML file
-        study_xml.write(
-            output_filename,
-            pretty_print=True,
-            xml_declaration=True,
-            encoding='UTF-8'
-        )
+        _write_xml(study_set, output_filename, pretty=pretty)
         
         return output_filename
     
@@ -550,7 +600,7 @@ def generate_study_xml(json_data: Dict[str, Any], output_filename: Optional[str]
 
 
 def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional[str] = None,
-                           action: str = "submission") -> str:
+                           action: str = "submission", pretty: bool = False) -> str:
     """
     Generate submission XML file from JSON data.
     
@@ -558,26 +608,27 @@ def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional
         json_data: Dictionary containing submission data
         output_filename: Optional filename for the XML file
         action: 'submission' (default) or 'update'
+        pretty: Indent the output (for debugging; ENA does not need it)
     
     Returns:
         str: Path to the generated XML file, or 'Error: ...' if there was an error
     """
     try:
         # Get submission data
-        metadata_results = json_data.get('metadata_results', {})
-        submission_data = metadata_results.get('submission', {})
+        submission_data = (json_data.get('metadata_results') or {}).get('submission')
         
         if not submission_data:
-            submission_data = json_data.get('submission', {})
+            submission_data = json_data.get('submission')
         
-        submission_records = submission_data.get('valid', []) if isinstance(submission_data, dict) else []
+        submission_records = _valid_records(submission_data)
         
         if not submission_records:
             return 'Error: No valid submission records found in JSON data'
         
         # Create XML structure
         submission_set = etree.Element('SUBMISSION_SET')
-        submission_xml = etree.ElementTree(submission_set)
+        
+        SE = etree.SubElement
         
         # Process each submission record
         for record in submission_records:
@@ -590,30 +641,25 @@ def generate_submission_xml(json_data: Dict[str, Any], output_filename: Optional
                     return 'Error: Missing Alias in submission record'
             
             # Create SUBMISSION element
-            submission_elt = etree.SubElement(submission_set, 'SUBMISSION', alias=alias)
-            actions_elt = etree.SubElement(submission_elt, 'ACTIONS')
-            action_elt = etree.SubElement(actions_elt, 'ACTION')
+            submission_elt = SE(submission_set, 'SUBMISSION', alias=alias)
+            actions_elt = SE(submission_elt, 'ACTIONS')
+            action_elt = SE(actions_elt, 'ACTION')
             
             if action == 'update':
-                etree.SubElement(action_elt, 'MODIFY')
+                SE(action_elt, 'MODIFY')
             else:
                 # For public submission, add ADD and RELEASE actions
-                etree.SubElement(action_elt, 'ADD')
+                SE(action_elt, 'ADD')
                 # Release immediately
-                action_elt = etree.SubElement(actions_elt, 'ACTION')
-                etree.SubElement(action_elt, 'RELEASE')
+                action_elt = SE(actions_elt, 'ACTION')
+                SE(action_elt, 'RELEASE')
         
         # Generate output filename if not provided
         if output_filename is None:
             output_filename = f"{uuid.uuid4()}_submission.xml"
         
         # Write XML file
-        submission_xml.write(
-            output_filename,
-            pretty_print=True,
-            xml_declaration=True,
-            encoding='UTF-8'
-        )
+        _write_xml(submission_set, output_filename, pretty=pretty)
         
         return output_filename
     
@@ -1,21 +1,116 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Dict, List, Any, Optional, Literal
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, ValidationError
+from typing import Dict, List, Any, Optional, Literal, Type, TypeVar
+from contextlib import asynccontextmanager
+import aiohttp
+import asyncio
 import json
-import traceback
+import logging
+import os
+import orjson
 
 from app.conversions.file_processor import parse_contents_api
 from app.profiler import cprofiled
 from app.validation.unified_validator import UnifiedFAANGValidator
 from app.submission import BioSampleSubmitter, ExperimentSubmitter, AnalysisSubmitter
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One connection pool for all OLS/BioSamples/ENA pre-fetches, so requests reuse
+    # connections and DNS lookups instead of paying a TLS handshake per batch
+    connector = aiohttp.TCPConnector(limit=0, limit_per_host=100, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        validator.http_session = session
+        try:
+            yield
+        finally:
+            validator.http_session = None
+
+
 app = FastAPI(
     title="FAANG Validation API",
     description="API for validating FAANG sample and metadata submissions",
-    version="1.0.0"
+    version="1.0.0",
+    # Validation results are large nested dicts; orjson encodes them straight to bytes
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _orjson_default(obj: Any) -> Any:
+    # Validation results keep the parsed pydantic model of every valid record
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError
+
+
+class ValidationResultsResponse(ORJSONResponse):
+    """Encodes validation results directly, skipping FastAPI's jsonable_encoder pass."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+# Largest request body accepted, in bytes (default 50 MB)
+MAX_BODY_BYTES = int(os.getenv("FAANG_MAX_BODY_BYTES", 50 * 1024 * 1024))
+
+
+class BodySizeLimitMiddleware:
+    """Rejects request bodies over ``max_bytes`` with 413 before they are buffered or parsed."""
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None:
+            try:
+                too_large = int(content_length) > self.max_bytes
+            except ValueError:
+                response = ORJSONResponse({"detail": "Invalid Content-Length header"}, status_code=400)
+                await response(scope, receive, send)
+                return
+            if too_large:
+                response = ORJSONResponse({"detail": "Request body too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
+            # the server enforces a declared length, so the body needs no further counting
+            await self.app(scope, receive, send)
+            return
+
+        # chunked bodies have no declared length; count them as they are received
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BODY_BYTES)
+
 validator = UnifiedFAANGValidator()
 
 
@@ -121,16 +216,22 @@ def normalize_run_record(record: dict) -> dict:
     return normalized
 
 
+# The validator registry is fixed after construction, so the type lists are built once
+_supported_types = validator.get_supported_types()
+# ...and the root payload built from them is encoded once
+_ROOT_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "FAANG Validation API",
+    "version": "1.0.0",
+    "supported_sample_types": _supported_types['sample_types'],
+    "supported_metadata_types": _supported_types['metadata_types']
+})
+
+
 # Health check endpoint
 @app.get("/")
 async def root():
-    return {
-        "status": "healthy",
-        "service": "FAANG Validation API",
-        "version": "1.0.0",
-        "supported_sample_types": validator.get_supported_types()['sample_types'],
-        "supported_metadata_types": validator.get_supported_types()['metadata_types']
-    }
+    return Response(content=_ROOT_BODY, media_type=ORJSONResponse.media_type)
 
 
 @app.get("/health")
@@ -146,52 +247,99 @@ async def health_check():
 
 @app.get("/supported-types")
 async def get_supported_types():
-    return validator.get_supported_types()
+    return _supported_types
 
 
 async def prefetch_data_by_type(data: Dict[str, List[Dict[str, Any]]], data_type: str):
+    # OLS and BioSamples/ENA are independent services, so both lookups run concurrently
     if data_type == "sample":
-        print("Pre-fetching sample ontology terms...")
-        await validator.prefetch_all_ontology_terms_async("sample", data)
-
-        print("Pre-fetching BioSample IDs...")
-        await validator.prefetch_all_biosample_ids_async(data)
+        logger.debug("Pre-fetching sample ontology terms and BioSample IDs...")
+        await asyncio.gather(
+            validator.prefetch_all_ontology_terms_async("sample", data),
+            validator.prefetch_all_biosample_ids_async(data),
+        )
 
     elif data_type == "experiment":
-        print("Pre-fetching experiment ontology terms...")
-        await validator.prefetch_all_ontology_terms_async("experiment", data)
-
-        print("Pre-fetching ENA experiment IDs...")
-        await validator.prefetch_ena_experiment_ids_async(data)
+        logger.debug("Pre-fetching experiment ontology terms and ENA experiment IDs...")
+        await asyncio.gather(
+            validator.prefetch_all_ontology_terms_async("experiment", data),
+            validator.prefetch_ena_experiment_ids_async(data),
+        )
 
     elif data_type == "analysis":
-        print("Skipping pre-fetch for analysis data (no ontology terms or relationships)")
+        logger.debug("Skipping pre-fetch for analysis data (no ontology terms or relationships)")
+
+
+RequestModelT = TypeVar("RequestModelT", bound=BaseModel)
+
 
-@app.post("/validate", response_model=ValidationResponse)
-async def validate_data(request: ValidationRequest):
+async def parse_json_body(request: Request, model: Type[RequestModelT]) -> RequestModelT:
+    """Decode a JSON request body with orjson and validate it into ``model``.
+
+    Errors are raised as RequestValidationError so clients still get FastAPI's usual 422 response.
+    """
+    body = await request.body()
+    if not body:
+        raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+              "input": {}, "ctx": {"error": e.msg}}],
+            body=body,
+        )
+    try:
+        return model.model_validate(payload)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=payload,
+        )
+
+
+def _json_request_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    # Keeps the request schema in the OpenAPI docs for routes that parse their own body
+    return {"requestBody": {"required": True,
+                            "content": {"application/json": {"schema": model.model_json_schema()}}}}
+
+
+def validate_and_report(data: Dict[str, List[Dict[str, Any]]], validate_relationships: bool = True,
+                        validate_ontology_text: bool = True):
+    # CPU-bound; the endpoints run it in a worker thread so the event loop keeps serving requests
+    results = validator.validate_all_records(
+        data,
+        validate_relationships=validate_relationships,
+        validate_ontology_text=validate_ontology_text
+    )
+    return results, validator.generate_unified_report(results)
+
+
+# ValidationResponse documents the payload only; re-validating the results we just built is wasted work
+@app.post("/validate", responses={200: {"model": ValidationResponse}},
+          openapi_extra=_json_request_body(ValidationRequest))
+async def validate_data(raw_request: Request):
+    request = await parse_json_body(raw_request, ValidationRequest)
     try:
         await prefetch_data_by_type(request.data, request.data_type)
 
-        print(f"Running validation for data_type: {request.data_type}...")
-        results = validator.validate_all_records(
+        logger.debug("Running validation for data_type: %s...", request.data_type)
+        results, report = await run_in_threadpool(
+            validate_and_report,
             request.data,
             validate_relationships=request.validate_relationships,
             validate_ontology_text=request.validate_ontology_text
         )
 
-        # report
-        report = validator.generate_unified_report(results)
-
-        return ValidationResponse(
-            status="success",
-            message="Validation completed successfully",
-            results=results,
-            report=report
-        )
+        return ValidationResultsResponse({
+            "status": "success",
+            "message": "Validation completed successfully",
+            "results": results,
+            "report": report
+        })
 
     except Exception as e:
-        print(f"Error during validation: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error during validation")
         raise HTTPException(
             status_code=500,
             detail={
@@ -202,8 +350,8 @@ async def validate_data(request: ValidationRequest):
         )
 
 
-@cprofiled(limit=25)
 @app.post("/validate-file")
+@cprofiled(limit=25)
 async def validate_file(
     file: UploadFile = File(...),
     data_type: Literal["sample", "experiment", "analysis"] = Query(
@@ -220,9 +368,8 @@ async def validate_file(
     )
 ):
     try:
-        contents = await file.read()
-
-        records, sheet_names, error_message = parse_contents_api(contents, file.filename)
+        # Parse straight from the spooled upload in a worker thread instead of reading it into memory
+        records, sheet_names, error_message = await run_in_threadpool(parse_contents_api, file.file, file.filename)
 
         if error_message:
             raise HTTPException(status_code=400, detail=error_message)
@@ -230,10 +377,7 @@ async def validate_file(
         if not sheet_names:
             raise HTTPException(status_code=400, detail="No valid sheets found in the file.")
 
-        print("FAANG Sample Validation")
-        print("=" * 50)
-        print("Supported types:", validator.get_supported_types())
-        print()
+        logger.debug("FAANG Sample Validation, supported types: %s", _supported_types)
 
         if not records:
             results = {}
@@ -241,29 +385,26 @@ async def validate_file(
         else:
             await prefetch_data_by_type(records, data_type)
 
-            print("Running validation...")
-            results = validator.validate_all_records(
+            logger.debug("Running validation...")
+            results, report = await run_in_threadpool(
+                validate_and_report,
                 records,
                 validate_relationships=True,
                 validate_ontology_text=True,
             )
 
-
-            report = validator.generate_unified_report(results)
-
-        return {
+        return ValidationResultsResponse({
             "status": "success",
             "filename": file.filename,
             "message": "File validated successfully",
             "results": results,
             "report": report,
-        }
+        })
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error during validation: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error during validation")
         raise HTTPException(
             status_code=500,
             detail={
@@ -318,8 +459,7 @@ async def submit_to_biosamples(request: SubmissionRequest):
             )
 
     except Exception as e:
-        print(f"Error during submission: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error during submission")
         raise HTTPException(
             status_code=500,
             detail={
@@ -350,7 +490,7 @@ def submit_analysis(request: AnalysisSubmissionRequest):
                 detail="Action must be 'submission' or 'update'",
             )
 
-        print(f"Preparing analysis submission: mode={request.mode}, action={request.action}")
+        logger.info("Preparing analysis submission: mode=%s, action=%s", request.mode, request.action)
 
         prepared_results = dict(request.validation_results)
 
@@ -366,7 +506,7 @@ def submit_analysis(request: AnalysisSubmissionRequest):
                     'model': record,
                     'data': record
                 })
-            print(f"Added {len(request.original_data['submission'])} submission records")
+            logger.debug("Added %d submission records", len(request.original_data['submission']))
 
         credentials = {
             "username": request.webin_username,
@@ -374,7 +514,7 @@ def submit_analysis(request: AnalysisSubmissionRequest):
             "mode": request.mode
         }
 
-        print(f"Submitting to ENA: mode={request.mode}, action={request.action}")
+        logger.info("Submitting to ENA: mode=%s, action=%s", request.mode, request.action)
 
         submitter = AnalysisSubmitter()
 
@@ -405,8 +545,7 @@ def submit_analysis(request: AnalysisSubmissionRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error during analysis {request.action}: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error during analysis %s", request.action)
         raise HTTPException(
             status_code=500,
             detail={
@@ -432,7 +571,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
                 detail="Action must be 'submission' or 'update'",
             )
 
-        print(f"Preparing experiment submission: mode={request.mode}, action={request.action}")
+        logger.info("Preparing experiment submission: mode=%s, action=%s", request.mode, request.action)
 
         # Prepare the results by adding ENA-specific sheets from original data
         prepared_results = dict(request.validation_results)
@@ -450,7 +589,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
                     'model': normalized_record,
                     'data': normalized_record
                 })
-            print(f"Added {len(request.original_data['experiment ena'])} experiment ena records")
+            logger.debug("Added %d experiment ena records", len(request.original_data['experiment ena']))
 
         # Add run records
         if 'run' in request.original_data:
@@ -465,7 +604,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
                     'model': normalized_record,
                     'data': normalized_record
                 })
-            print(f"Added {len(request.original_data['run'])} run records")
+            logger.debug("Added %d run records", len(request.original_data['run']))
 
         # Add study records
         if 'study' in request.original_data:
@@ -479,7 +618,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
                     'model': record,
                     'data': record
                 })
-            print(f"Added {len(request.original_data['study'])} study records")
+            logger.debug("Added %d study records", len(request.original_data['study']))
 
         # Add submission records
         if 'submission' in request.original_data:
@@ -493,7 +632,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
                     'model': record,
                     'data': record
                 })
-            print(f"Added {len(request.original_data['submission'])} submission records")
+            logger.debug("Added %d submission records", len(request.original_data['submission']))
 
         # Prepare credentials
         credentials = {
@@ -502,7 +641,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
             "mode": request.mode
         }
 
-        print(f"Submitting to ENA: mode={request.mode}, action={request.action}")
+        logger.info("Submitting to ENA: mode=%s, action=%s", request.mode, request.action)
 
         # Initialize the experiment submitter
         submitter = ExperimentSubmitter()
@@ -535,8 +674,7 @@ def submit_experiment(request: ExperimentSubmissionRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error during experiment {request.action}: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error during experiment %s", request.action)
         raise HTTPException(
             status_code=500,
             detail={
@@ -547,17 +685,11 @@ def submit_experiment(request: ExperimentSubmissionRequest):
         )
 
 
+@app.post("/validate-data", openapi_extra=_json_request_body(ValidationDataRequest))
 @cprofiled(limit=25)
-@app.post("/validate-data")
-async def validate_data(request: ValidationDataRequest):
-        print("FAANG Validation")
-        print("=" * 50)
-        supported_types = validator.get_supported_types()
-        print(f"Supported sample types: {', '.join(supported_types.get('sample_types', []))}")
-        print(f"Supported experiment types: {', '.join(supported_types.get('experiment_types', []))}")
-        print(f"Supported analysis types: {', '.join(supported_types.get('analysis_types', []))}")
-        print(f"Supported metadata types: {', '.join(supported_types.get('metadata_types', []))}")
-        print()
+async def validate_data(raw_request: Request):
+        request = await parse_json_body(raw_request, ValidationDataRequest)
+        logger.debug("FAANG Validation, supported types: %s", _supported_types)
 
         # Check if records is empty
         if not request.data:
@@ -566,23 +698,21 @@ async def validate_data(request: ValidationDataRequest):
             # validation
             await prefetch_data_by_type(request.data, request.data_type)
 
-            print("Running validation...")
-            results = validator.validate_all_records(
+            logger.debug("Running validation...")
+            results, report = await run_in_threadpool(
+                validate_and_report,
                 request.data,
                 validate_relationships=True,
                 validate_ontology_text=True
             )
-
-            # report
-            report = validator.generate_unified_report(results)
-            print(report)
+            logger.debug("%s", report)
             
-            return {
+            return ValidationResultsResponse({
                 "status": "success",
                 "message": "File validated successfully",
                 "results": results,
                 "report": report
-            }
+            })
 
 
 if __name__ == "__main__":
@@ -4,14 +4,21 @@ import io
 import pstats
 import functools
 import inspect
+import os
 import time
 
+# cProfile hooks every Python call, so profiling is opt-in: set FAANG_PROFILE=1 to enable it
+PROFILING_ENABLED = os.getenv("FAANG_PROFILE") == "1"
+
 def cprofiled(sortby: str = "cumtime", limit: int = 20, output_file: str | None = None):
     """
     Decorator for profiling sync or async functions with cProfile.
     Prints or saves results with total time in seconds/minutes.
+    Returns the function unchanged unless FAANG_PROFILE=1.
     """
     def decorate(func):
+        if not PROFILING_ENABLED:
+            return func
         if inspect.iscoroutinefunction(func):
             # Async function
             @functools.wraps(func)
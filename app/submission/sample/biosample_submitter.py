@@ -245,17 +245,13 @@ class BioSampleSubmitter:
         for sample_type in sample_types:
             results = sample_results.get(sample_type, {}) or {}
 
-            # Get validator to use its get_sample_type_name() method to construct the correct key
+            # Get the validator so results are read with the same keys it wrote them under
             validator = self.sample_validators.get(sample_type)
             if not validator:
                 print(f"  Warning: No validator found for sample type '{sample_type}', skipping")
                 continue
 
-            # Use the validator's get_sample_type_name() to get the normalized name used in results keys
-            normalized_sample_type = validator.get_sample_type_name()
-            valid_samples_key = f'valid_{normalized_sample_type}s'
-            if valid_samples_key.endswith("ss") and not normalized_sample_type.endswith("s"):
-                valid_samples_key = valid_samples_key[:-1]
+            valid_samples_key, _ = validator.get_results_keys()
 
             if valid_samples_key in results and results[valid_samples_key]:
 
@@ -403,18 +399,13 @@ class BioSampleSubmitter:
         for sample_type in sample_types:
             results = sample_results.get(sample_type, {}) or {}
 
-            # Get validator to use its get_sample_type_name() method to construct the correct key
-            # This ensures we use the same normalization logic that was used when creating the results
+            # Get the validator so results are read with the same keys it wrote them under
             validator = self.sample_validators.get(sample_type)
             if not validator:
                 print(f"  Warning: No validator found for sample type '{sample_type}', skipping")
                 continue
 
-            # Use the validator's get_sample_type_name() to get the normalized name used in results keys
-            normalized_sample_type = validator.get_sample_type_name()
-            valid_samples_key = f'valid_{normalized_sample_type}s'
-            if valid_samples_key.endswith("ss") and not normalized_sample_type.endswith("s"):
-                valid_samples_key = valid_samples_key[:-1]
+            valid_samples_key, _ = validator.get_results_keys()
 
             if valid_samples_key in results and results[valid_samples_key]:
                 count = len(results[valid_samples_key])
@@ -584,7 +575,7 @@ class BioSampleSubmitter:
 
         # Step 3: Check all validation results (current submission) for the parent
         for sample_type_key, type_results in results_by_type.items():
-            # Get the validator for this sample type to use its get_sample_type_name() method
+            # Get the validator for this sample type so its results keys can be used
             parent_validator = self.sample_validators.get(sample_type_key)
             if not parent_validator:
                 # Try with normalized key (space to underscore)
@@ -594,11 +585,7 @@ class BioSampleSubmitter:
             if not parent_validator:
                 continue
 
-            # Use the validator's get_sample_type_name() to get the normalized name used in results keys
-            normalized_sample_type = parent_validator.get_sample_type_name()
-            valid_key = f'valid_{normalized_sample_type}s'
-            if valid_key.endswith("ss") and not normalized_sample_type.endswith("s"):
-                valid_key = valid_key[:-1]
+            valid_key, _ = parent_validator.get_results_keys()
 
             if valid_key in type_results:
                 for parent_sample in type_results[valid_key]:
@@ -177,7 +177,8 @@ class OntologyValidator:
             print(f"Error fetching from OLS for {term_id}: {e}")
             return term_id, []
 
-    async def batch_fetch_from_ols(self, term_ids: List[str]) -> Dict[str, List[Dict]]:
+    async def batch_fetch_from_ols(self, term_ids: List[str],
+                                   session: Optional[aiohttp.ClientSession] = None) -> Dict[str, List[Dict]]:
         # Filter out terms already in cache
         terms_to_fetch = [tid for tid in term_ids if tid not in self._cache]
 
@@ -185,10 +186,14 @@ class OntologyValidator:
             # all terms are cached
             return {tid: self._cache[tid] for tid in term_ids}
 
+        if session is None:
+            # no shared session from the caller, use one just for this batch
+            async with aiohttp.ClientSession() as session:
+                return await self.batch_fetch_from_ols(term_ids, session)
+
         # fetch terms from OLS concurrently
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.fetch_from_ols_async(term_id, session) for term_id in terms_to_fetch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [self.fetch_from_ols_async(term_id, session) for term_id in terms_to_fetch]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
         result_dict = {}
         for result in results:
@@ -386,17 +391,22 @@ class RelationshipValidator:
             print(f"Error fetching BioSample {sample_id} async: {e}")
             return sample_id, {}
 
-    async def batch_fetch_biosamples(self, biosample_ids: List[str]) -> Dict[str, Dict]:
+    async def batch_fetch_biosamples(self, biosample_ids: List[str],
+                                     session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Dict]:
         # filter IDs already in cache
         ids_to_fetch = [bid for bid in biosample_ids if bid not in self.biosamples_cache]
 
         if not ids_to_fetch:
             return {bid: self.biosamples_cache[bid] for bid in biosample_ids}
 
+        if session is None:
+            # no shared session from the caller, use one just for this batch
+            async with aiohttp.ClientSession() as session:
+                return await self.batch_fetch_biosamples(biosample_ids, session)
+
         # fetch BioSamples data concurrently
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.fetch_biosample_async(sample_id, session) for sample_id in ids_to_fetch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [self.fetch_biosample_async(sample_id, session) for sample_id in ids_to_fetch]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
         result_dict = {}
         for result in results:
@@ -504,12 +514,18 @@ class RelationshipValidator:
 
         return control_experiments
 
-    async def batch_check_ena_experiments(self, experiment_ids: Set[str]) -> Dict[str, bool]:
+    async def batch_check_ena_experiments(self, experiment_ids: Set[str],
+                                          session: Optional[aiohttp.ClientSession] = None) -> Dict[str, bool]:
         results = {}
 
         if not experiment_ids:
             return results
 
+        if session is None:
+            # no shared session from the caller, use one just for this batch
+            async with aiohttp.ClientSession() as session:
+                return await self.batch_check_ena_experiments(experiment_ids, session)
+
         print(f"Pre-fetching {len(experiment_ids)} ENA experiment IDs...")
 
         async def fetch_ena_experiment(session: aiohttp.ClientSession, experiment_id: str) -> tuple:
@@ -526,14 +542,13 @@ class RelationshipValidator:
 
             return experiment_id, False
 
-        async with aiohttp.ClientSession() as session:
-            tasks = [fetch_ena_experiment(session, exp_id) for exp_id in experiment_ids]
-            completed = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [fetch_ena_experiment(session, exp_id) for exp_id in experiment_ids]
+        completed = await asyncio.gather(*tasks, return_exceptions=True)
 
-            for result in completed:
-                if isinstance(result, tuple):
-                    exp_id, exists = result
-                    results[exp_id] = exists
+        for result in completed:
+            if isinstance(result, tuple):
+                exp_id, exists = result
+                results[exp_id] = exists
 
         print(f"Pre-fetch complete. Found {sum(results.values())} existing experiments in ENA.")
         return results
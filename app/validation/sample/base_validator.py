@@ -29,6 +29,11 @@ class BaseValidator(ABC):
     def get_sample_type_name(self) -> str:
         pass
 
+    def get_results_keys(self) -> Tuple[str, str]:
+        """Keys of the valid and invalid record lists in this validator's results."""
+        sample_type = self.get_sample_type_name()
+        return f'valid_{sample_type}s', f'invalid_{sample_type}s'
+
     def get_recommended_fields(self, model_class) -> List[str]:
         recommended_fields = []
 
@@ -122,10 +127,13 @@ class BaseValidator(ABC):
         **kwargs
     ) -> Dict[str, Any]:
         sample_type = self.get_sample_type_name()
+        valid_key, invalid_key = self.get_results_keys()
+        valid_samples = []
+        invalid_samples = []
 
         results = {
-            f'valid_{sample_type}s': [],
-            f'invalid_{sample_type}s': [],
+            valid_key: valid_samples,
+            invalid_key: invalid_samples,
             'summary': {
                 'total': len(sheet_records),
                 'valid': 0,
@@ -155,13 +163,13 @@ class BaseValidator(ABC):
                 if errors['ontology_warnings']:
                     valid_entry['ontology_warnings'] = errors['ontology_warnings']
 
-                results[f'valid_{sample_type}s'].append(valid_entry)
+                valid_samples.append(valid_entry)
                 results['summary']['valid'] += 1
 
                 if errors['warnings'] or errors['ontology_warnings'] or errors['field_warnings']:
                     results['summary']['warnings'] += 1
             else:
-                results[f'invalid_{sample_type}s'].append({
+                invalid_samples.append({
                     'index': i,
                     'sample_name': sample_name,
                     'data': record,
@@ -176,21 +184,21 @@ class BaseValidator(ABC):
         return results
 
     def _add_relationship_errors(self, results: Dict[str, Any], all_samples: Dict[str, List[Dict]]):
-        sample_type = self.get_sample_type_name()
+        valid_key, invalid_key = self.get_results_keys()
         relationship_errors = self._get_relationship_errors(all_samples)
 
         if not relationship_errors:
             return
 
         # Add to valid samples
-        for sample in results[f'valid_{sample_type}s']:
+        for sample in results[valid_key]:
             sample_name = sample['sample_name']
             if sample_name in relationship_errors:
                 sample['relationship_errors'] = relationship_errors[sample_name]
                 results['summary']['relationship_errors'] += 1
 
         # Add to invalid samples
-        for sample in results[f'invalid_{sample_type}s']:
+        for sample in results[invalid_key]:
             sample_name = sample['sample_name']
             if sample_name in relationship_errors:
                 if 'relationship_errors' not in sample['errors']:
@@ -207,6 +215,7 @@ class BaseValidator(ABC):
     def generate_validation_report(self, validation_results: Dict[str, Any]) -> str:
         sample_type = self.get_sample_type_name()
         sample_type_title = sample_type.title()
+        valid_key, invalid_key = self.get_results_keys()
 
         report = []
         report.append(f"FAANG {sample_type_title} Validation Report")
@@ -217,10 +226,10 @@ class BaseValidator(ABC):
         report.append(f"{sample_type_title}s with warnings: {validation_results['summary']['warnings']}")
 
         # validation errors
-        if validation_results[f'invalid_{sample_type}s']:
+        if validation_results[invalid_key]:
             report.append("\n\nValidation Errors:")
             report.append("-" * 20)
-            for sample in validation_results[f'invalid_{sample_type}s']:
+            for sample in validation_results[invalid_key]:
                 report.append(f"\n{sample_type_title}: {sample['sample_name']} (index: {sample['index']})")
 
                 # field errors from Pydantic validation
@@ -249,9 +258,9 @@ class BaseValidator(ABC):
                         report.append(f"  ONTOLOGY WARNING: {warning}")
 
         # warnings and relationship issues for valid samples
-        if validation_results[f'valid_{sample_type}s']:
+        if validation_results[valid_key]:
             warnings_found = False
-            for sample in validation_results[f'valid_{sample_type}s']:
+            for sample in validation_results[valid_key]:
                 if (sample.get('warnings') or sample.get('relationship_errors') or
                     sample.get('ontology_warnings') or sample.get('field_warnings')):
                     if not warnings_found:
@@ -1,4 +1,6 @@
-from typing import Dict, List, Any
+import logging
+from typing import Dict, List, Any, Optional
+import aiohttp
 from app.profiler import cprofiled
 from app.validation.sample.teleostei_embryo_validator import TeleosteiEmbryoValidator
 from app.validation.sample.organism_validator import OrganismValidator
@@ -40,6 +42,8 @@ from app.validation.experiment.additional_experiment_validators import (
     WGSValidator
 )
 
+logger = logging.getLogger(__name__)
+
 
 class UnifiedFAANGValidator:
     def __init__(self):
@@ -156,18 +160,21 @@ class UnifiedFAANGValidator:
         }
         self.supported_experiment_types = set(self.experiment_validators.keys())
 
+        # HTTP session shared by the async pre-fetches; the app assigns one for its lifetime,
+        # otherwise each pre-fetch batch opens its own
+        self.http_session: Optional[aiohttp.ClientSession] = None
 
     def prefetch_all_ontology_terms(self, data: Dict[str, List[Dict[str, Any]]]):
         # collect unique term IDs
         term_ids = collect_ontology_terms_from_data(data)
 
         if not term_ids:
-            print("No ontology terms to pre-fetch")
+            logger.debug("No ontology terms to pre-fetch")
             return
 
         # shared ontology validator
         self.shared_ontology_validator.batch_fetch_from_ols_sync(list(term_ids))
-        print(f"Pre-fetch complete. Cache now contains {len(self.shared_ontology_validator._cache)} terms.")
+        logger.debug("Pre-fetch complete. Cache now contains %d terms.", len(self.shared_ontology_validator._cache))
 
     @cprofiled()
     # async version for use in FastAPI endpoints
@@ -179,29 +186,29 @@ class UnifiedFAANGValidator:
             term_ids = collect_ontology_terms_from_data(data)
 
         if not term_ids:
-            print("No ontology terms to pre-fetch")
+            logger.debug("No ontology terms to pre-fetch")
             return
 
         # Use shared ontology validator
-        result = await self.shared_ontology_validator.batch_fetch_from_ols(list(term_ids))
+        result = await self.shared_ontology_validator.batch_fetch_from_ols(list(term_ids), self.http_session)
         self.shared_ontology_validator._cache.update(result)
-        print(f"Pre-fetch complete. Cache now contains {len(self.shared_ontology_validator._cache)} terms.")
+        logger.debug("Pre-fetch complete. Cache now contains %d terms.", len(self.shared_ontology_validator._cache))
 
     def prefetch_all_biosample_ids(self, data: Dict[str, List[Dict[str, Any]]]):
         # shared relationship validator
         biosample_ids = self.shared_relationship_validator.collect_biosample_ids_from_samples(data)
 
         if not biosample_ids:
-            print("No BioSample IDs to pre-fetch")
+            logger.debug("No BioSample IDs to pre-fetch")
             return
 
-        print(f"Found {len(biosample_ids)} BioSample IDs to fetch")
+        logger.debug("Found %d BioSample IDs to fetch", len(biosample_ids))
 
         # fetch all BioSample IDs concurrently
         self.shared_relationship_validator.batch_fetch_biosamples_sync(list(biosample_ids))
 
-        print(
-            f"Pre-fetch complete. BioSample cache now contains {len(self.shared_relationship_validator.biosamples_cache)} entries.")
+        logger.debug("Pre-fetch complete. BioSample cache now contains %d entries.",
+                     len(self.shared_relationship_validator.biosamples_cache))
 
     @cprofiled()
     # async version for FastAPI endpoint
@@ -210,32 +217,37 @@ class UnifiedFAANGValidator:
         biosample_ids = self.shared_relationship_validator.collect_biosample_ids_from_samples(data)
 
         if not biosample_ids:
-            print("No BioSample IDs to pre-fetch")
+            logger.debug("No BioSample IDs to pre-fetch")
             return
 
-        print(f"Found {len(biosample_ids)} BioSample IDs to fetch")
+        logger.debug("Found %d BioSample IDs to fetch", len(biosample_ids))
 
         # fetch all BioSample IDs concurrently using async method
-        result = await self.shared_relationship_validator.batch_fetch_biosamples(list(biosample_ids))
+        result = await self.shared_relationship_validator.batch_fetch_biosamples(list(biosample_ids),
+                                                                               self.http_session)
         self.shared_relationship_validator.biosamples_cache.update(result)
 
-        print(
-            f"Pre-fetch complete. BioSample cache now contains {len(self.shared_relationship_validator.biosamples_cache)} entries.")
+        logger.debug("Pre-fetch complete. BioSample cache now contains %d entries.",
+                     len(self.shared_relationship_validator.biosamples_cache))
 
     @cprofiled()
     async def prefetch_ena_experiment_ids_async(self, data: Dict[str, List[Dict[str, Any]]]):
         control_exp_ids = self.shared_relationship_validator.collect_control_experiments_from_data(data)
 
         if not control_exp_ids:
-            print("No control experiments to pre-fetch")
+            logger.debug("No control experiments to pre-fetch")
             return
 
-        ena_cache = await self.shared_relationship_validator.batch_check_ena_experiments(control_exp_ids)
+        ena_cache = await self.shared_relationship_validator.batch_check_ena_experiments(control_exp_ids,
+                                                                                     self.http_session)
 
-        if 'chip-seq dna-binding proteins' in self.experiment_validators:
-            self.experiment_validators['chip-seq dna-binding proteins'].ena_cache = ena_cache
+        # Merge rather than replace: validation runs in a worker thread after this returns, and
+        # replacing the dict would let a concurrent request's pre-fetch swap out this one's results
+        chip_seq_validator = self.experiment_validators.get('chip-seq dna-binding proteins')
+        if chip_seq_validator is not None:
+            chip_seq_validator.ena_cache.update(ena_cache)
 
-        print(f"Pre-fetch complete. ENA cache contains {len(ena_cache)} experiments.")
+        logger.debug("Pre-fetch complete. Fetched %d ENA experiments.", len(ena_cache))
 
     @cprofiled()
     def validate_all_records(
@@ -290,14 +302,15 @@ class UnifiedFAANGValidator:
         has_experiments = any(k in self.supported_experiment_types for k in data.keys())
 
         if has_samples:
-            print("Sample types in data:", [k for k in data.keys() if k in self.supported_sample_types])
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sample types in data: %s", [k for k in data.keys() if k in self.supported_sample_types])
             for sample_type, samples in data.items():
                 if sample_type in self.supported_sample_types:
                     if not samples:
-                        print(f"No samples found for type '{sample_type}'. Skipping.")
+                        logger.debug("No samples found for type '%s'. Skipping.", sample_type)
                         continue
 
-                    print(f"Validating {len(samples)} {sample_type} samples...")
+                    logger.debug("Validating %d %s samples...", len(samples), sample_type)
 
                     validator = self.sample_validators[sample_type]
 
@@ -330,7 +343,7 @@ class UnifiedFAANGValidator:
             # Process metadata types
             for metadata_type, metadata_records in data.items():
                 if metadata_type in self.supported_metadata_types or metadata_type in self.supported_analysis_metadata_types:
-                    print(f"Validating {metadata_type} metadata...")
+                    logger.debug("Validating %s metadata...", metadata_type)
 
                     if has_analyses and not has_samples and metadata_type in self.supported_analysis_metadata_types:
                         validator = self.analysis_metadata_validators[metadata_type]
@@ -363,14 +376,15 @@ class UnifiedFAANGValidator:
 
         # Process analysis types
         if has_analyses:
-            print("Analysis types in data:", [k for k in data.keys() if k in self.supported_analysis_types])
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Analysis types in data: %s", [k for k in data.keys() if k in self.supported_analysis_types])
             for analysis_type, analyses in data.items():
                 if analysis_type in self.supported_analysis_types:
                     if not analyses:
-                        print(f"No analyses found for type '{analysis_type}'. Skipping.")
+                        logger.debug("No analyses found for type '%s'. Skipping.", analysis_type)
                         continue
 
-                    print(f"Validating {len(analyses)} {analysis_type} analyses...")
+                    logger.debug("Validating %d %s analyses...", len(analyses), analysis_type)
 
                     validator = self.analysis_validators[analysis_type]
                     results = validator.validate_records(analyses)
@@ -391,14 +405,15 @@ class UnifiedFAANGValidator:
                     all_results['analysis_summary']['warnings'] += summary['warnings']
 
         if has_experiments:
-            print("Experiment types in data:", [k for k in data.keys() if k in self.supported_experiment_types])
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Experiment types in data: %s", [k for k in data.keys() if k in self.supported_experiment_types])
             for exp_type, experiments in data.items():
                 if exp_type in self.supported_experiment_types:
                     if not experiments:
-                        print(f"No experiments found for type '{exp_type}'. Skipping.")
+                        logger.debug("No experiments found for type '%s'. Skipping.", exp_type)
                         continue
 
-                    print(f"Validating {len(experiments)} {exp_type} experiments...")
+                    logger.debug("Validating %d %s experiments...", len(experiments), exp_type)
 
                     validator = self.experiment_validators[exp_type]
 